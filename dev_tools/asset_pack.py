@@ -0,0 +1,53 @@
+import importlib
+import os
+
+from module.base.asset_pack import ASSET_PACK
+from module.base.button import Button, ButtonWrapper
+from module.config.config_manual import ManualConfig as AzurLaneConfig
+from module.config.utils import iter_folder
+from module.logger import logger
+
+
+def iter_assets_modules():
+    """
+    Yields:
+        str: Module path of generated assets, such as `tasks.base.assets.assets_base_page`
+    """
+    for folder in iter_folder(AzurLaneConfig.ASSETS_MODULE, is_dir=True):
+        assets = os.path.join(folder, 'assets')
+        if not os.path.isdir(assets):
+            continue
+        for file in iter_folder(assets, ext='.py'):
+            name, _ = os.path.splitext(os.path.basename(file))
+            if name.startswith('assets_'):
+                yield f'{AzurLaneConfig.ASSETS_MODULE.strip("./")}.{os.path.basename(folder)}.assets.{name}'
+
+
+def iter_buttons():
+    """
+    Yields:
+        Button: All buttons of all servers in generated assets modules
+    """
+    for module in iter_assets_modules():
+        module = importlib.import_module(module)
+        for obj in module.__dict__.values():
+            if not isinstance(obj, ButtonWrapper):
+                continue
+            for assets in obj.data_buttons.values():
+                if isinstance(assets, Button):
+                    yield assets
+                elif isinstance(assets, list):
+                    yield from assets
+
+
+def generate_pack():
+    """
+    Pack all template crops from generated assets modules into ASSET_PACK_FILE.
+    Run this after `python -m dev_tools.button_extract`.
+    """
+    count = ASSET_PACK.build(iter_buttons())
+    logger.info(f'Packed {count} templates into {ASSET_PACK.file}')
+
+
+if __name__ == '__main__':
+    generate_pack()
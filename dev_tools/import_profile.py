@@ -0,0 +1,87 @@
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+# import time:       123 |       4567 |   module.base.utils
+REGEX_IMPORT_TIME = re.compile(r'^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)')
+
+
+class ImportRecord:
+    def __init__(self, name, self_us, cumulative_us, depth):
+        self.name = name
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.depth = depth
+
+    @property
+    def package(self):
+        return self.name.split('.')[0]
+
+
+def profile_import(target, python=sys.executable):
+    """
+    Import a module in a fresh interpreter with `-X importtime`.
+
+    Args:
+        target (str): Module to import, such as `module.webui.app`
+        python (str): Python executable
+
+    Returns:
+        list[ImportRecord]: In the order of import finished
+    """
+    proc = subprocess.run(
+        [python, '-X', 'importtime', '-c', f'import {target}'],
+        capture_output=True, text=True, encoding='utf-8', errors='replace'
+    )
+    records = []
+    for line in proc.stderr.splitlines():
+        res = REGEX_IMPORT_TIME.match(line)
+        if res:
+            self_us, cumulative_us, indent, name = res.groups()
+            records.append(ImportRecord(name, int(self_us), int(cumulative_us), depth=len(indent) // 2))
+    if proc.returncode != 0:
+        # Show the last lines of traceback, records before the error are still useful
+        error = [line for line in proc.stderr.splitlines() if not REGEX_IMPORT_TIME.match(line)]
+        print('\n'.join(error[-5:]))
+    return records
+
+
+def show(target, records, top=20):
+    total = sum(r.self_us for r in records)
+    print(f'\n===== import {target}: {total / 1e6:.3f}s, {len(records)} modules =====')
+
+    print(f'\nTop {top} modules by self time')
+    for r in sorted(records, key=lambda r: r.self_us, reverse=True)[:top]:
+        print(f'{r.self_us / 1000:10.1f}ms  {r.name}')
+
+    print(f'\nTop {top} modules by cumulative time')
+    for r in sorted(records, key=lambda r: r.cumulative_us, reverse=True)[:top]:
+        print(f'{r.cumulative_us / 1000:10.1f}ms  {r.name}')
+
+    packages = defaultdict(int)
+    for r in records:
+        packages[r.package] += r.self_us
+    print(f'\nTop {top} packages by total time')
+    for package, us in sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f'{us / 1000:10.1f}ms  {package}')
+
+
+if __name__ == '__main__':
+    """
+    Show where startup time goes.
+
+    Profile imports of webui and alas instances:
+        python -m dev_tools.import_profile
+    Profile a specific module:
+        python -m dev_tools.import_profile tasks.dungeon.dungeon
+    """
+    parser = argparse.ArgumentParser(description='Profile import time of modules')
+    parser.add_argument('targets', nargs='*', default=['module.webui.app', 'src'],
+                        help='Modules to import, default to webui and alas instance')
+    parser.add_argument('--top', type=int, default=20, help='Number of rows to show')
+    args = parser.parse_args()
+
+    for target in args.targets:
+        show(target, profile_import(target), top=args.top)
@@ -0,0 +1,135 @@
+import argparse
+import time
+
+import inflection
+
+from module.base.trace import TRACER
+from module.config.config import TaskEnd
+from module.device.replay import ReplayDevice, ReplayDiverged, ReplayEnd, ReplayRecorder
+from module.exception import GameNotRunningError, GameStuckError, GameTooManyClickError
+from module.logger import logger
+from src import StarRailCopilot
+
+"""
+Record a task on a real device, then replay it offline to benchmark scripts.
+
+Record, task runs on the emulator and all screenshots and controls are saved:
+    python -m dev_tools.replay record Dungeon --config src --folder ./log/replay/dungeon
+Benchmark, task runs on recorded screenshots, no emulator needed:
+    python -m dev_tools.replay bench Dungeon --config src --folder ./log/replay/dungeon --preload
+
+Tasks may modify the config, use a copy of your config.
+"""
+
+
+def run_task(src, task):
+    """
+    Args:
+        src (StarRailCopilot):
+        task (str): Task name, such as `Dungeon`
+
+    Returns:
+        str: `finished` if task ran until the end,
+            `ended` if replay ended before that,
+            `diverged` if script didn't follow the recorded session.
+    """
+    try:
+        src.__getattribute__(inflection.underscore(task))()
+    except TaskEnd:
+        pass
+    except ReplayDiverged as e:
+        logger.warning(e)
+        return 'diverged'
+    except ReplayEnd as e:
+        logger.info(e)
+        return 'ended'
+    except (GameStuckError, GameTooManyClickError, GameNotRunningError) as e:
+        # Script waited or clicked on a frame forever
+        logger.warning(f'Replay diverged, {type(e).__name__}: {e}')
+        return 'diverged'
+    return 'finished'
+
+
+def record(task, config, folder):
+    src = StarRailCopilot(config)
+    recorder = ReplayRecorder(src.device, folder).start()
+    try:
+        run_task(src, task)
+    finally:
+        recorder.stop()
+
+
+def outermost_spans(category):
+    """
+    Spans of a category that are not inside another span of the same category,
+    so `matched_ocr()` calling `detect_and_ocr()` is counted once.
+
+    Returns:
+        list[float]: Seconds of each span
+    """
+    # Key: span name. Value: category
+    categories = {}
+    for path, cat, _, _, _, _ in TRACER.spans:
+        categories[path[-1]] = cat
+
+    costs = []
+    for path, cat, start, end, _, _ in TRACER.spans:
+        if cat != category:
+            continue
+        if any(categories.get(name) == category for name in path[:-1]):
+            continue
+        costs.append((end - start) / 1e9)
+    return costs
+
+
+def bench(task, config, folder, preload=False):
+    src = StarRailCopilot(config)
+    device = ReplayDevice(src.config, folder)
+    if preload:
+        device.preload()
+    src.device = device
+
+    TRACER.clear()
+    TRACER.enabled = True
+    start = time.perf_counter()
+    result = run_task(src, task)
+    cost = time.perf_counter() - start
+    TRACER.enabled = False
+
+    frames = sum(1 for path, _, _, _, _, _ in TRACER.spans if path[-1] == 'Device.screenshot')
+    rows = {
+        'screenshot': outermost_spans('device'),
+        'template match': outermost_spans('match'),
+        'ocr': outermost_spans('ocr'),
+        'page switch': outermost_spans('ui'),
+    }
+
+    logger.hr(f'Replay benchmark: {task}', level=1)
+    logger.attr('Result', result)
+    logger.attr('Time', f'{cost:.3f}s')
+    logger.attr('Frames', f'{frames}, {frames / cost:.1f} fps' if cost > 0 else frames)
+    logger.attr('Controls', f'{device.control_hit} matched, {device.control_miss} missed')
+    for name, costs in rows.items():
+        if costs:
+            total = sum(costs)
+            logger.attr(name, f'{len(costs)} calls, total {total:.3f}s, {total / len(costs) * 1000:.2f}ms per call')
+        else:
+            logger.attr(name, '0 calls')
+
+    TRACER.show_summary()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Record and replay tasks for offline benchmarks')
+    parser.add_argument('action', choices=['record', 'bench'])
+    parser.add_argument('task', help='Task name, such as Dungeon')
+    parser.add_argument('--config', default='src', help='Config name, default to src')
+    parser.add_argument('--folder', default=None, help='Session folder, default to ./log/replay/<task>')
+    parser.add_argument('--preload', action='store_true', help='Decode all frames before benchmark')
+    args = parser.parse_args()
+
+    folder = args.folder or f'./log/replay/{inflection.underscore(args.task)}'
+    if args.action == 'record':
+        record(args.task, args.config, folder)
+    else:
+        bench(args.task, args.config, folder, preload=args.preload)
@@ -1,5 +1,4 @@
 import os
-import re
 import threading
 import time
 from datetime import datetime, timedelta
@@ -8,6 +7,7 @@ import inflection
 from cached_property import cached_property
 
 from module.base.decorator import del_cached_property
+from module.base.trace import TRACER
 from module.config.config import AzurLaneConfig, TaskEnd
 from module.config.utils import deep_get, deep_set
 from module.exception import *
@@ -135,30 +135,71 @@ class AzurLaneAutoScript:
         """
         Save last 60 screenshots in ./log/error/<timestamp>
         Save logs to ./log/error/<timestamp>/log.txt
+
+        Screenshots and logs are collected here, and written to disk in a background thread,
+        so restart doesn't wait for disk IO. The thread is not a daemon, files are still written if alas exits.
         """
-        from module.base.utils import save_image
-        from module.handler.sensitive_info import (handle_sensitive_image, handle_sensitive_logs)
         if self.config.Error_SaveError:
-            if not os.path.exists('./log/error'):
-                os.mkdir('./log/error')
             folder = f'./log/error/{int(time.time() * 1000)}'
             logger.warning(f'Saving error: {folder}')
-            os.mkdir(folder)
-            for data in self.device.screenshot_deque:
+            images = self.device.screenshot_deque.items()
+            ext = self.device.screenshot_deque.encode_ext
+            log_start = logger.hr_offset
+            log_end = logger.log_offset()
+            thread = threading.Thread(
+                target=self._save_error_files,
+                args=(folder, images, ext, logger.log_file, log_start, log_end),
+                name='ErrorLogWriter'
+            )
+            thread.start()
+
+    @staticmethod
+    def _save_error_files(folder, images, ext, log_file, log_start, log_end):
+        """
+        Args:
+            folder (str):
+            images (list[dict]): Encoded screenshots, {'time': datetime, 'data': bytes}
+            ext (str): Extension of encoded screenshots, such as `.jpg`
+            log_file (str):
+            log_start (int): Byte offset where the last level 0 hr starts
+            log_end (int): Byte offset of the end of log when error occurred
+        """
+        from module.handler.sensitive_info import handle_sensitive_logs
+        try:
+            os.makedirs(folder, exist_ok=True)
+            for data in images:
                 image_time = datetime.strftime(data['time'], '%Y-%m-%d_%H-%M-%S-%f')
-                image = handle_sensitive_image(data['image'])
-                save_image(image, f'{folder}/{image_time}.png')
-            with open(logger.log_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                start = 0
-                for index, line in enumerate(lines):
-                    line = line.strip(' \r\t\n')
-                    if re.match('^═{15,}$', line):
-                        start = index
-                lines = lines[start - 2:]
-                lines = handle_sensitive_logs(lines)
-            with open(f'{folder}/log.txt', 'w', encoding='utf-8') as f:
+                with open(f'{folder}/{image_time}{ext}', 'wb') as f:
+                    f.write(data['data'])
+
+            if log_start is None or (log_end is not None and log_start > log_end):
+                log_start = 0
+            with open(log_file, 'rb') as f:
+                f.seek(log_start)
+                if log_end is None:
+                    content = f.read()
+                else:
+                    content = f.read(log_end - log_start)
+            lines = content.decode('utf-8', errors='replace').splitlines(keepends=True)
+            lines = handle_sensitive_logs(lines)
+            with open(f'{folder}/log.txt', 'w', encoding='utf-8', newline='') as f:
                 f.writelines(lines)
+        except Exception as e:
+            logger.warning(f'Failed to save error log: {e}')
+
+    def save_trace(self, task):
+        """
+        Show time spent in the task and save spans to ./log/trace/<config_name>_<task>_<timestamp>.json
+
+        Args:
+            task (str):
+        """
+        TRACER.show_summary()
+        try:
+            TRACER.export_chrome(f'./log/trace/{self.config_name}_{task}_{int(time.time() * 1000)}.json')
+        except OSError as e:
+            logger.warning(f'Failed to export trace: {e}')
+        TRACER.clear()
 
     def wait_until(self, future):
         """
@@ -171,9 +212,11 @@ class AzurLaneAutoScript:
             bool: True if wait finished, False if config changed.
         """
         future = future + timedelta(seconds=1)
+        self.config.flush()
         self.config.start_watching()
         while 1:
-            if datetime.now() > future:
+            remain = (future - datetime.now()).total_seconds()
+            if remain <= 0:
                 return True
             if self.stop_event is not None:
                 if self.stop_event.is_set():
@@ -181,7 +224,12 @@ class AzurLaneAutoScript:
                     logger.info(f"[{self.config_name}] exited. Reason: Update")
                     exit(0)
 
-            time.sleep(5)
+            # Wake up right at the future time, or when stop event is set,
+            # check config changes every 5s in between
+            if self.stop_event is not None:
+                self.stop_event.wait(timeout=min(remain, 5))
+            else:
+                time.sleep(min(remain, 5))
 
             if self.config.should_reload():
                 return False
@@ -272,12 +320,20 @@ class AzurLaneAutoScript:
                 del_cached_property(self, 'config')
                 continue
 
+            # Re-evaluate screenshot methods between tasks
+            self.device.screenshot_auto_tune_run()
+
             # Run
             logger.info(f'Scheduler: Start task `{task}`')
             self.device.stuck_record_clear()
             self.device.click_record_clear()
             logger.hr(task, level=0)
-            success = self.run(inflection.underscore(task))
+            TRACER.enabled = self.config.Optimization_PerformanceTrace
+            with TRACER.span(task, cat='task'):
+                success = self.run(inflection.underscore(task))
+            if TRACER.enabled:
+                self.save_trace(task)
+            self.config.flush()
             logger.info(f'Scheduler: End task `{task}`')
             self.is_first_task = False
 
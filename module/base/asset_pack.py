@@ -0,0 +1,160 @@
+import json
+import os
+import struct
+import typing as t
+
+import numpy as np
+
+from module.base.decorator import cached_property, del_cached_property
+
+ASSET_PACK_FILE = './assets/assets.pack'
+ASSET_PACK_MAGIC = b'SRCPACK1'
+# Magic, index length
+ASSET_PACK_HEADER = struct.Struct('<8sI')
+ASSET_PACK_ALIGN = 16
+
+
+def asset_key(file, area):
+    """
+    Args:
+        file (str): Filepath to an assets
+        area (tuple): Area to crop template
+
+    Returns:
+        str: Such as `./assets/share/base/page/BACK.png|1217,21,1248,51`
+    """
+    return f'{file}|{",".join(str(int(x)) for x in area)}'
+
+
+class AssetPack:
+    """
+    All template crops packed into one binary file, and memory-mapped at runtime.
+    `Button.image` gets zero-copy views from here instead of decoding PNG files,
+    views are read-only and shared between processes through the OS page cache.
+
+    File layout:
+        header (magic, index length) | index in json | padding | raw image data
+
+    Build the pack after assets changed:
+        python -m dev_tools.asset_pack
+    """
+
+    def __init__(self, file=ASSET_PACK_FILE):
+        self.file = file
+
+    @cached_property
+    def _loaded(self) -> t.Tuple[dict, t.Optional[np.memmap]]:
+        """
+        Open the pack, templates whose assets are modified after packing are dropped from index.
+        Checked once here, reopen with `release()`.
+
+        Returns:
+            dict: Index, key: asset_key(), value: {'offset': int, 'shape': list}
+            np.memmap: Raw image data, or None if pack unavailable
+        """
+        try:
+            stat = os.stat(self.file)
+            with open(self.file, 'rb') as f:
+                magic, length = ASSET_PACK_HEADER.unpack(f.read(ASSET_PACK_HEADER.size))
+                if magic != ASSET_PACK_MAGIC:
+                    return {}, None
+                index = json.loads(f.read(length).decode('utf-8'))
+            start = _align(ASSET_PACK_HEADER.size + length)
+            if stat.st_size <= start:
+                return index, None
+            data = np.memmap(self.file, dtype=np.uint8, mode='r', offset=start)
+        except (OSError, ValueError, struct.error):
+            return {}, None
+
+        # Assets modified after packing
+        outdated = set()
+        for file in set(key.split('|', 1)[0] for key in index):
+            try:
+                if os.stat(file).st_mtime > stat.st_mtime:
+                    outdated.add(file)
+            except FileNotFoundError:
+                pass
+        if outdated:
+            index = {key: row for key, row in index.items() if key.split('|', 1)[0] not in outdated}
+        return index, data
+
+    @property
+    def index(self) -> dict:
+        return self._loaded[0]
+
+    @property
+    def available(self) -> bool:
+        return self._loaded[1] is not None
+
+    def get(self, file, area) -> t.Optional[np.ndarray]:
+        """
+        Args:
+            file (str): Filepath to an assets
+            area (tuple): Area to crop template
+
+        Returns:
+            np.ndarray: Read-only view of the template, or None if not in pack or pack is outdated.
+        """
+        index, data = self._loaded
+        if data is None:
+            return None
+        row = index.get(asset_key(file, area))
+        if row is None:
+            return None
+
+        shape = tuple(row['shape'])
+        offset = row['offset']
+        size = int(np.prod(shape))
+        return data[offset:offset + size].reshape(shape)
+
+    def release(self):
+        del_cached_property(self, '_loaded')
+
+    def build(self, buttons):
+        """
+        Args:
+            buttons (iterable[Button]):
+
+        Returns:
+            int: Number of templates packed
+        """
+        from module.base.utils import load_image
+
+        index = {}
+        chunks = []
+        offset = 0
+        for button in buttons:
+            key = asset_key(button.file, button.area)
+            if key in index:
+                continue
+            image = np.ascontiguousarray(load_image(button.file, button.area), dtype=np.uint8)
+            index[key] = {
+                'offset': offset,
+                'shape': list(image.shape),
+            }
+            chunks.append(image.tobytes())
+            offset += image.nbytes
+
+        index_bytes = json.dumps(index, ensure_ascii=False).encode('utf-8')
+        start = _align(ASSET_PACK_HEADER.size + len(index_bytes))
+        padding = b'\x00' * (start - ASSET_PACK_HEADER.size - len(index_bytes))
+
+        os.makedirs(os.path.dirname(self.file), exist_ok=True)
+        temp = f'{self.file}.tmp'
+        with open(temp, 'wb') as f:
+            f.write(ASSET_PACK_HEADER.pack(ASSET_PACK_MAGIC, len(index_bytes)))
+            f.write(index_bytes)
+            f.write(padding)
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(temp, self.file)
+
+        self.release()
+        return len(index)
+
+
+def _align(n):
+    return (n + ASSET_PACK_ALIGN - 1) // ASSET_PACK_ALIGN * ASSET_PACK_ALIGN
+
+
+ASSET_PACK = AssetPack()
@@ -1,5 +1,6 @@
 import module.config.server as server_
-from module.base.button import Button, ButtonWrapper, ClickButton, match_template
+from module.base.button import Button, ButtonMatcher, ButtonWrapper, ClickButton, match_template
+from module.base.decorator import cached_property
 from module.base.timer import Timer
 from module.base.utils import *
 from module.config.config import AzurLaneConfig
@@ -45,6 +46,64 @@ class ModuleBase:
             self.device = device
 
         self.interval_timer = {}
+        # Key: (button name, method). Value: (image digest, result, matched button or None, button offsets)
+        self._match_memo = {}
+        # Results of current image. Key: (button name, method). Value: same as `_match_memo`
+        self._match_memo_image = None
+        self._match_memo_current = {}
+
+    def _match_memo_run(self, button, method, func):
+        """
+        Run detection on `button`, or reuse the last result if pixels in its search area are unchanged.
+        Decisions are the same as running `func` every time, since only pixel-identical areas hit the memo.
+
+        Args:
+            button (ButtonWrapper):
+            method (tuple): Detection method and its parameters.
+                Methods that may give different results must have different names,
+                such as `match_template_any`, which rejects on coarse images first.
+            func (callable): Function that runs the detection and returns bool
+
+        Returns:
+            bool:
+        """
+        if not isinstance(button, ButtonWrapper):
+            return func()
+
+        assets = button.buttons
+        key = (button.name, method, tuple(id(b) for b in assets))
+        image = self.device.image
+        if self._match_memo_image is not image:
+            self._match_memo_image = image
+            self._match_memo_current = {}
+
+        memo = self._match_memo_current.get(key)
+        if memo is None:
+            search = (
+                min(b.search[0] for b in assets),
+                min(b.search[1] for b in assets),
+                max(b.search[2] for b in assets),
+                max(b.search[3] for b in assets),
+            )
+            digest = self.device.image_digest(search)
+            memo = self._match_memo.get(key)
+            if memo is None or memo[0] != digest:
+                result = func()
+                # Nothing matched, don't let a later memo hit restore the button of an earlier match
+                if not result:
+                    button._matched_button = None
+                memo = (digest, result, button._matched_button, [b._button_offset for b in assets])
+                self._match_memo[key] = memo
+                self._match_memo_current[key] = memo
+                return result
+            self._match_memo_current[key] = memo
+
+        # Restore side effects of detection
+        _, result, matched, offsets = memo
+        button._matched_button = matched
+        for b, offset in zip(assets, offsets):
+            b._button_offset = offset
+        return result
 
     def match_template(self, button, interval=0, similarity=0.85):
         """
@@ -69,7 +128,9 @@ class ModuleBase:
         if interval and not self.interval_is_reached(button, interval=interval):
             return False
 
-        appear = button.match_template(self.device.image, similarity=similarity)
+        appear = self._match_memo_run(
+            button, ('match_template', similarity),
+            lambda: button.match_template(self.device.image, similarity=similarity))
 
         if appear and interval:
             self.interval_reset(button, interval=interval)
@@ -114,14 +175,49 @@ class ModuleBase:
         if interval and not self.interval_is_reached(button, interval=interval):
             return False
 
-        appear = button.match_template_color(self.device.image, similarity=similarity, threshold=threshold)
+        appear = self._match_memo_run(
+            button, ('match_template_color', similarity, threshold),
+            lambda: button.match_template_color(self.device.image, similarity=similarity, threshold=threshold))
 
         if appear and interval:
             self.interval_reset(button, interval=interval)
 
         return appear
 
+    @cached_property
+    def button_matcher(self) -> ButtonMatcher:
+        return ButtonMatcher()
+
+    def match_template_any(self, buttons, interval=0, similarity=0.85):
+        """
+        Match a group of buttons on current screenshot, stop at the first one appears.
+        Screenshot preprocessing is shared among buttons, see `ButtonMatcher`.
+
+        Args:
+            buttons (iterable[ButtonWrapper]): The earlier, the higher priority.
+            interval (int, float): interval between two active events.
+            similarity (int, float): 0 to 1.
+
+        Returns:
+            ButtonWrapper: The button appears, or None.
+        """
+        for button in buttons:
+            self.device.stuck_record_add(button)
+
+            if interval and not self.interval_is_reached(button, interval=interval):
+                continue
+
+            if self._match_memo_run(
+                    button, ('match_template_any', similarity),
+                    lambda: self.button_matcher.match_template(button, self.device.image, similarity=similarity)):
+                if interval:
+                    self.interval_reset(button, interval=interval)
+                return button
+
+        return None
+
     appear = match_template
+    appear_any = match_template_any
 
     def appear_then_click(self, button, interval=5, similarity=0.85):
         appear = self.appear(button, interval=interval, similarity=similarity)
@@ -153,6 +249,34 @@ class ModuleBase:
                 prev_image = image
                 timer.reset()
 
+    def wait_until_change(self, button=None, timeout=Timer(3, count=6), threshold=8):
+        """
+        Take screenshots until the area of button changes, compared with current image.
+        Use this instead of sleeping a fixed time after an action.
+
+        Args:
+            button (ButtonWrapper, tuple): Button or area to watch, None for full screen.
+            timeout (Timer):
+            threshold (int): 0 to 255, a pixel on signature differs more than this is considered changed.
+
+        Returns:
+            bool: If changed, False if timeout.
+        """
+        if button is not None and not isinstance(button, tuple):
+            button = button.area
+        prev = self.device.signature_crop(button)
+        timeout.reset()
+        while 1:
+            self.device.screenshot()
+
+            diff = np.max(np.abs(self.device.signature_crop(button) - prev))
+            if diff > threshold:
+                logger.info(f'Changed: {button}')
+                return True
+            if timeout.reached():
+                logger.warning(f'wait_until_change({button}) timeout')
+                return False
+
     def image_crop(self, button):
         """Extract the area from image.
 
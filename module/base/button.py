@@ -1,6 +1,8 @@
 import module.config.server as server
+from module.base.asset_pack import ASSET_PACK
 from module.base.decorator import cached_property, del_cached_property
 from module.base.resource import Resource
+from module.base.trace import trace
 from module.base.utils import *
 from module.exception import ScriptError
 
@@ -33,10 +35,22 @@ class Button(Resource):
 
     @cached_property
     def image(self):
-        return load_image(self.file, self.area)
+        # Zero-copy view from the packed assets, fallback to decode PNG file
+        image = ASSET_PACK.get(self.file, self.area)
+        if image is None:
+            image = load_image(self.file, self.area)
+        return image
+
+    @cached_property
+    def image_coarse(self):
+        """
+        Template in grayscale and downscaled by `ButtonMatcher.scale`, used in coarse matching.
+        """
+        return ButtonMatcher.to_coarse(self.image)
 
     def resource_release(self):
         del_cached_property(self, 'image')
+        del_cached_property(self, 'image_coarse')
         self.clear_offset()
 
     def __str__(self):
@@ -153,6 +167,7 @@ class ButtonWrapper(Resource):
 
         raise ScriptError(f'ButtonWrapper({self}) on server {server.server} has no fallback button')
 
+    @trace(cat='match', detail=0)
     def match_color(self, image, threshold=10) -> bool:
         for assets in self.buttons:
             if assets.match_color(image, threshold=threshold):
@@ -160,6 +175,7 @@ class ButtonWrapper(Resource):
                 return True
         return False
 
+    @trace(cat='match', detail=0)
     def match_template(self, image, similarity=0.85) -> bool:
         for assets in self.buttons:
             if assets.match_template(image, similarity=similarity):
@@ -167,6 +183,7 @@ class ButtonWrapper(Resource):
                 return True
         return False
 
+    @trace(cat='match', detail=0)
     def match_template_color(self, image, similarity=0.85, threshold=30) -> bool:
         for assets in self.buttons:
             if assets.match_template_color(image, similarity=similarity, threshold=threshold):
@@ -210,6 +227,114 @@ class ButtonWrapper(Resource):
         return area_size(self.area)[1]
 
 
+class ButtonMatcher:
+    """
+    Match a group of buttons on the same screenshot.
+
+    Screenshot is converted to a downscaled grayscale image once and shared by all buttons,
+    templates are matched on it first to reject obvious misses,
+    only the rest of them run a full `Button.match_template()`.
+    Matching stops at the first button appears.
+
+    Examples:
+        matcher = ButtonMatcher()
+        button = matcher.match_first([MAIN_CHECK, MENU_CHECK, ...], image)
+    """
+    # Downscale ratio of the coarse image
+    scale = 0.5
+    # Coarse matching is allowed to be less similar than the full one by this margin,
+    # since details are lost after downscaling.
+    coarse_margin = 0.2
+    # Templates smaller than this after downscaling are too small to have a reliable coarse result
+    coarse_min_size = 6
+
+    def __init__(self):
+        self._image = None
+        self._image_coarse = None
+
+    @classmethod
+    def to_coarse(cls, image):
+        """
+        Args:
+            image (np.ndarray): Shape (height, width, channel)
+
+        Returns:
+            np.ndarray: Shape (height * scale, width * scale)
+        """
+        image = rgb2gray(image)
+        return cv2.resize(image, None, fx=cls.scale, fy=cls.scale, interpolation=cv2.INTER_AREA)
+
+    def image_coarse(self, image):
+        """
+        Args:
+            image (np.ndarray): Screenshot.
+
+        Returns:
+            np.ndarray: Coarse screenshot, cached until another screenshot is given.
+        """
+        if image is not self._image:
+            self._image = image
+            self._image_coarse = self.to_coarse(image)
+        return self._image_coarse
+
+    def coarse_reject(self, button, image, similarity=0.85) -> bool:
+        """
+        Args:
+            button (Button):
+            image (np.ndarray): Screenshot.
+            similarity (float): 0-1.
+
+        Returns:
+            bool: True if button definitely doesn't appear on screenshot.
+        """
+        template = button.image_coarse
+        height, width = template.shape[:2]
+        if height < self.coarse_min_size or width < self.coarse_min_size:
+            return False
+
+        search = np.round(np.array(button.search) * self.scale).astype(int)
+        image = crop(self.image_coarse(image), search, copy=False)
+        res = cv2.matchTemplate(template, image, cv2.TM_CCOEFF_NORMED)
+        _, sim, _, _ = cv2.minMaxLoc(res)
+        return sim < similarity - self.coarse_margin
+
+    @trace(cat='match', detail=1)
+    def match_template(self, button, image, similarity=0.85) -> bool:
+        """
+        Same as `ButtonWrapper.match_template()`, but with coarse rejection.
+
+        Args:
+            button (ButtonWrapper):
+            image (np.ndarray): Screenshot.
+            similarity (float): 0-1.
+
+        Returns:
+            bool.
+        """
+        for assets in button.buttons:
+            if self.coarse_reject(assets, image, similarity=similarity):
+                continue
+            if assets.match_template(image, similarity=similarity):
+                button._matched_button = assets
+                return True
+        return False
+
+    def match_first(self, buttons, image, similarity=0.85) -> t.Optional[ButtonWrapper]:
+        """
+        Args:
+            buttons (iterable[ButtonWrapper]): Buttons to match, the earlier, the higher priority.
+            image (np.ndarray): Screenshot.
+            similarity (float): 0-1.
+
+        Returns:
+            ButtonWrapper: The first button that appears, or None if none of them appears.
+        """
+        for button in buttons:
+            if self.match_template(button, image, similarity=similarity):
+                return button
+        return None
+
+
 class ClickButton:
     def __init__(self, button, name='CLICK_BUTTON'):
         self.area = button
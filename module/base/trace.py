@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from functools import wraps
+
+from module.logger import logger
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'detail', 'stack', 'start')
+
+    def __init__(self, tracer, name, cat, detail):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.detail = detail
+
+    def __enter__(self):
+        self.stack = self.tracer.stack()
+        self.stack.append(self.name)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        end = time.perf_counter_ns()
+        path = tuple(self.stack)
+        self.stack.pop()
+        self.tracer.spans.append(
+            (path, self.cat, self.start, end, threading.get_ident(), self.detail))
+        return False
+
+
+class Tracer:
+    """
+    Timing spans of screenshots, controls, template matching, OCR and page switches,
+    kept in a ring buffer, so a slow task can be broken down into emulator, OCR and script time.
+
+    Spans are recorded only when `enabled`, otherwise a traced call costs one attribute lookup.
+    Export spans with `export_chrome()` and open the file in chrome://tracing or https://ui.perfetto.dev
+    """
+
+    def __init__(self, maxlen=50000):
+        self.enabled = False
+        # Each span: (path, category, start_ns, end_ns, thread_id, detail)
+        # path is a tuple of span names from the outermost span on that thread
+        self.spans = deque(maxlen=maxlen)
+        self._local = threading.local()
+
+    def stack(self) -> list:
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def span(self, name, cat='', detail=None):
+        """
+        Usage:
+            with TRACER.span('Task', cat='task', detail='Dungeon'):
+                ...
+
+        Args:
+            name (str): Span name, spans with the same name are summed up in summary
+            cat (str): Category, such as `device`, `ocr`
+            detail (str): Shown in chrome trace only
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name, cat, detail)
+
+    def clear(self):
+        self.spans.clear()
+
+    def export_chrome(self, file):
+        """
+        Args:
+            file (str): Path to a json file in Chrome trace event format
+        """
+        pid = os.getpid()
+        events = []
+        for path, cat, start, end, tid, detail in list(self.spans):
+            event = {
+                'name': path[-1],
+                'cat': cat,
+                'ph': 'X',
+                'ts': start / 1000,
+                'dur': (end - start) / 1000,
+                'pid': pid,
+                'tid': tid,
+            }
+            if detail is not None:
+                event['args'] = {'detail': detail}
+            events.append(event)
+
+        folder = os.path.dirname(file)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(file, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        logger.info(f'Trace exported: {file}')
+
+    def summary(self):
+        """
+        Flame graph in rows, sum up spans that have the same path.
+
+        Returns:
+            list[tuple[tuple[str], int, float, float]]:
+                Path, count, total seconds, self seconds.
+                Children are listed right after their parent, sorted by total time.
+        """
+        count = defaultdict(int)
+        total = defaultdict(int)
+        children = defaultdict(int)
+        for path, _, start, end, _, _ in list(self.spans):
+            count[path] += 1
+            total[path] += end - start
+            if len(path) > 1:
+                children[path[:-1]] += end - start
+
+        tree = defaultdict(list)
+        for path in total:
+            tree[path[:-1]].append(path)
+
+        rows = []
+
+        def visit(parent):
+            for path in sorted(tree[parent], key=lambda p: total[p], reverse=True):
+                self_ns = max(total[path] - children[path], 0)
+                rows.append((path, count[path], total[path] / 1e9, self_ns / 1e9))
+                visit(path)
+
+        visit(())
+        return rows
+
+    def show_summary(self, limit=40):
+        rows = self.summary()
+        if not rows:
+            return
+        logger.hr('Trace summary', level=2)
+        logger.info(f'{"Span":<48} {"Count":>6} {"Total":>9} {"Self":>9}')
+        for path, count, total, self_time in rows[:limit]:
+            name = '  ' * (len(path) - 1) + path[-1]
+            logger.info(f'{name:<48} {count:>6} {total:>8.3f}s {self_time:>8.3f}s')
+        if len(rows) > limit:
+            logger.info(f'... {len(rows) - limit} more rows in exported trace')
+
+
+TRACER = Tracer()
+
+
+def trace(cat='', detail=None):
+    """
+    Record a span on each call when `TRACER.enabled`.
+
+    Args:
+        cat (str): Category, such as `device`, `ocr`
+        detail (int): Index of the argument to show in span details, such as 0 for `self`.
+            Shows `arg.name` if argument has one, or `str(arg)`.
+    """
+
+    def decorator(func):
+        name = func.__qualname__
+
+        @wraps(func)
+        def trace_wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return func(*args, **kwargs)
+            info = None
+            if detail is not None and len(args) > detail:
+                arg = args[detail]
+                info = str(getattr(arg, 'name', arg))
+            with _Span(TRACER, name, cat, info):
+                return func(*args, **kwargs)
+
+        return trace_wrapper
+
+    return decorator
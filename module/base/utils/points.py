@@ -1,5 +1,4 @@
 import numpy as np
-from scipy import optimize
 
 from .utils import area_pad
 
@@ -385,6 +384,9 @@ def fit_points(points, mod, encourage=1):
         distance = np.linalg.norm(points - point, axis=1)
         return np.sum(1 / (1 + np.exp(encourage / distance) / distance))
 
+    # Imported here, scipy is slow to import and only used here
+    from scipy import optimize
+
     # Fast local minimizer
     # result = optimize.minimize(cal_distance, np.mean(points, axis=0), method='SLSQP')
     # return result['x'] % mod
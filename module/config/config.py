@@ -1,10 +1,11 @@
+import atexit
+import bisect
 import copy
 import datetime
-import operator
 import threading
+import weakref
 
 from module.base.filter import Filter
-from module.base.utils import SelectedGrids
 from module.config.config_generated import GeneratedConfig
 from module.config.config_manual import ManualConfig
 from module.config.config_updater import ConfigUpdater
@@ -40,6 +41,113 @@ class Function:
             return False
 
 
+class SchedulerQueue:
+    """
+    Tasks indexed by next_run and priority.
+
+    The queue is rebuilt when config data is reloaded from file,
+    and updated task by task when `task_delay()` or `task_call()` modifies a task,
+    so getting the next task doesn't need to scan and sort all tasks.
+    """
+
+    def __init__(self, priority):
+        """
+        Args:
+            priority (str): SCHEDULER_PRIORITY
+        """
+        self.filter = Filter(regex=r"(.*)", attr=["command"])
+        self.filter.load(priority)
+        # Key: task name. Value: Function
+        self.functions: "dict[str, Function]" = {}
+        # Key: task name. Value: int, index in SCHEDULER_PRIORITY, tasks not in it won't be scheduled
+        self.priority: "dict[str, int]" = {}
+        # Enabled tasks with valid next_run, sorted by (next_run, priority, command)
+        self.queue: "list[tuple[datetime, int, str]]" = []
+        # Enabled tasks with invalid next_run, they run first
+        self.error: "list[Function]" = []
+
+    def load(self, data):
+        """
+        Rebuild the queue.
+
+        Args:
+            data (dict): Config data
+        """
+        self.functions = {}
+        for command, func in data.items():
+            func = Function(func)
+            # Function.command is "Unknown" if task has no Scheduler group
+            if func.command == command:
+                self.functions[command] = func
+        ordered = self.filter.apply(list(self.functions.values()))
+        self.priority = {func.command: index for index, func in enumerate(ordered) if isinstance(func, Function)}
+
+        self.queue = []
+        self.error = []
+        for func in self.functions.values():
+            self._insert(func)
+        self.queue.sort()
+
+    def update(self, command, data):
+        """
+        Update one task.
+
+        Args:
+            command (str): Task name
+            data (dict): Config data
+        """
+        old = self.functions.get(command)
+        if old is None:
+            # Unknown task, can't have its priority
+            return
+        self._remove(old)
+        func = Function(data.get(command, {}))
+        self.functions[command] = func
+        self._insert(func, keep_sorted=True)
+
+    def _key(self, func):
+        return func.next_run, self.priority[func.command], func.command
+
+    def _insert(self, func, keep_sorted=False):
+        if not func.enable:
+            return
+        if not isinstance(func.next_run, datetime):
+            self.error.append(func)
+            return
+        if func.command not in self.priority:
+            return
+        if keep_sorted:
+            bisect.insort(self.queue, self._key(func))
+        else:
+            self.queue.append(self._key(func))
+
+    def _remove(self, func):
+        if func in self.error:
+            self.error.remove(func)
+            return
+        if not isinstance(func.next_run, datetime) or func.command not in self.priority:
+            return
+        key = self._key(func)
+        index = bisect.bisect_left(self.queue, key)
+        if index < len(self.queue) and self.queue[index] == key:
+            self.queue.pop(index)
+
+    def get(self, now):
+        """
+        Args:
+            now (datetime):
+
+        Returns:
+            list[Function]: Pending tasks, sorted by priority
+            list[Function]: Waiting tasks, sorted by next_run
+        """
+        split = bisect.bisect_left(self.queue, (now,))
+        pending = sorted(self.queue[:split], key=lambda key: key[1])
+        pending = self.error + [self.functions[key[2]] for key in pending]
+        waiting = [self.functions[key[2]] for key in self.queue[split:]]
+        return pending, waiting
+
+
 def name_to_function(name):
     """
     Args:
@@ -60,16 +168,33 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
 
     # Class property
     is_hoarding_task = True
+    # Seconds to hold modifications in memory before writing into file,
+    # modifications in between are coalesced into one write.
+    write_behind_delay = 1
+    # Config objects that have modifications not yet written
+    write_pending: "weakref.WeakSet[AzurLaneConfig]" = weakref.WeakSet()
 
     def __setattr__(self, key, value):
         if key in self.bound:
             path = self.bound[key]
-            self.modified[path] = value
+            self.modified_set(path, value)
             if self.auto_update:
-                self.update()
+                self.update_later()
         else:
             super().__setattr__(key, value)
 
+    def modified_set(self, path, value):
+        """
+        Record a modification. All modifications must go through here,
+        `self.modified` is also read and swapped by the write-behind timer thread.
+
+        Args:
+            path (str): Argument path in yaml file, such as `{task}.Scheduler.Enable`
+            value (Any):
+        """
+        with self._write_lock:
+            self.modified[path] = value
+
     def __init__(self, config_name, task=None):
         logger.attr("Server", self.SERVER)
         # This will read ./config/<config_name>.json
@@ -91,11 +216,16 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         # waiting_task: Run time haven't been reached, wait needed.
         self.pending_task = []
         self.waiting_task = []
+        self.scheduler_queue = SchedulerQueue(self.SCHEDULER_PRIORITY)
         # Task to run and bind.
         # Task means the name of the function to run in AzurLaneAutoScript class.
         self.task: Function
         # Template config is used for dev tools
         self.is_template_config = config_name.startswith("template")
+        # Write-behind states, see `update_later()`
+        self._write_lock = threading.RLock()
+        self._write_timer: threading.Timer = None
+        self._write_stat = (0, 0)
 
         if self.is_template_config:
             # For dev tools
@@ -103,6 +233,8 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
             self.auto_update = False
             self.task = name_to_function("template")
         else:
+            # Modifications from previous config objects must be written before reading
+            AzurLaneConfig.flush_all(config_name)
             self.load()
             if task is None:
                 # Bind `Alas` by default which includes emulator settings.
@@ -115,11 +247,14 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
             self.save()
 
     def load(self):
-        self.data = self.read_file(self.config_name)
-        self.config_override()
+        with self._write_lock:
+            self._write_stat = self.get_file_stat()
+            self.data = self.read_file(self.config_name)
+            self.config_override()
 
-        for path, value in self.modified.items():
-            deep_set(self.data, keys=path, value=value)
+            for path, value in self.modified.items():
+                deep_set(self.data, keys=path, value=value)
+            self.scheduler_queue.load(self.data)
 
     def bind(self, func, func_list=None):
         """
@@ -172,35 +307,11 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         """
         Calculate tasks, set pending_task and waiting_task
         """
-        pending = []
-        waiting = []
-        error = []
         now = datetime.now()
         if AzurLaneConfig.is_hoarding_task:
             now -= self.hoarding
-        for func in self.data.values():
-            func = Function(func)
-            if not func.enable:
-                continue
-            if not isinstance(func.next_run, datetime):
-                error.append(func)
-            elif func.next_run < now:
-                pending.append(func)
-            else:
-                waiting.append(func)
-
-        f = Filter(regex=r"(.*)", attr=["command"])
-        f.load(self.SCHEDULER_PRIORITY)
-        if pending:
-            pending = f.apply(pending)
-        if waiting:
-            waiting = f.apply(waiting)
-            waiting = sorted(waiting, key=operator.attrgetter("next_run"))
-        if error:
-            pending = error + pending
 
-        self.pending_task = pending
-        self.waiting_task = waiting
+        self.pending_task, self.waiting_task = self.scheduler_queue.get(now)
 
     def get_next(self):
         """
@@ -230,24 +341,82 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
             raise RequestHumanTakeover
 
     def save(self, mod_name='alas'):
-        if not self.modified:
-            return False
+        with self._write_lock:
+            if not self.modified:
+                return False
 
-        for path, value in self.modified.items():
-            deep_set(self.data, keys=path, value=value)
+            # Take a snapshot, new modifications go to a fresh dict
+            modified, self.modified = self.modified, {}
+            for path, value in modified.items():
+                deep_set(self.data, keys=path, value=value)
 
-        logger.info(
-            f"Save config {filepath_config(self.config_name, mod_name)}, {dict_to_kv(self.modified)}"
-        )
-        # Don't use self.modified = {}, that will create a new object.
-        self.modified.clear()
-        self.write_file(self.config_name, data=self.data)
+            logger.info(
+                f"Save config {filepath_config(self.config_name, mod_name)}, {dict_to_kv(modified)}"
+            )
+            self.write_file(self.config_name, data=self.data)
+            self._write_stat = self.get_file_stat()
+            AzurLaneConfig.write_pending.discard(self)
 
     def update(self):
-        self.load()
-        self.config_override()
-        self.bind(self.task)
-        self.save()
+        with self._write_lock:
+            self._write_timer_cancel()
+            self.load()
+            self.config_override()
+            self.bind(self.task)
+            self.save()
+
+    def update_later(self):
+        """
+        Apply modifications in memory now, and write them into file after `write_behind_delay`.
+        Use `flush()` to write immediately.
+        """
+        with self._write_lock:
+            for path, value in self.modified.items():
+                deep_set(self.data, keys=path, value=value)
+            for arg, path in self.bound.items():
+                if path in self.modified:
+                    super().__setattr__(arg, self.modified[path])
+            for task in set(path.split('.', 1)[0] for path in self.modified):
+                self.scheduler_queue.update(task, self.data)
+            AzurLaneConfig.write_pending.add(self)
+            if self._write_timer is None:
+                self._write_timer = threading.Timer(self.write_behind_delay, self.flush)
+                self._write_timer.daemon = True
+                self._write_timer.start()
+
+    def flush(self):
+        """
+        Write pending modifications into file.
+        If file has been modified by others (GUI), reload it first to merge their changes.
+
+        Returns:
+            bool: If wrote.
+        """
+        with self._write_lock:
+            self._write_timer_cancel()
+            if not self.modified:
+                return False
+            if self.get_file_stat() != self._write_stat:
+                self.load()
+                # Arguments changed by others
+                self.bind(self.task)
+            self.save()
+            return True
+
+    def _write_timer_cancel(self):
+        if self._write_timer is not None:
+            self._write_timer.cancel()
+            self._write_timer = None
+
+    @classmethod
+    def flush_all(cls, config_name=None):
+        """
+        Args:
+            config_name (str): Flush config objects of this config only, None for all.
+        """
+        for config in list(cls.write_pending):
+            if config_name is None or config.config_name == config_name:
+                config.flush()
 
     def config_override(self):
         now = datetime.now().replace(microsecond=0)
@@ -323,9 +492,9 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         Returns:
             Any:
         """
-        self.modified[keys] = value
+        self.modified_set(keys, value)
         if self.auto_update:
-            self.update()
+            self.update_later()
 
     def task_delay(self, success=None, server_update=None, target=None, minute=None, task=None):
         """
@@ -384,8 +553,11 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
             if task is None:
                 task = self.task.command
             logger.info(f"Delay task `{task}` to {run} ({kv})")
-            self.modified[f'{task}.Scheduler.NextRun'] = run
-            self.update()
+            self.modified_set(f'{task}.Scheduler.NextRun', run)
+            # Write through, GUI may kill this process right after task ends,
+            # a NextRun lost in write-behind would run the task again.
+            self.update_later()
+            self.flush()
         else:
             raise ScriptError(
                 "Missing argument in delay_next_run, should set at least one"
@@ -412,12 +584,11 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
 
         if force_call or self.is_task_enabled(task):
             logger.info(f"Task call: {task}")
-            self.modified[f"{task}.Scheduler.NextRun"] = datetime.now().replace(
-                microsecond=0
-            )
-            self.modified[f"{task}.Scheduler.Enable"] = True
+            with self._write_lock:
+                self.modified_set(f"{task}.Scheduler.NextRun", datetime.now().replace(microsecond=0))
+                self.modified_set(f"{task}.Scheduler.Enable", True)
             if self.auto_update:
-                self.update()
+                self.update_later()
             return True
         else:
             logger.info(f"Task call: {task} (skipped because disabled by user)")
@@ -498,6 +669,9 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         return backup
 
 
+atexit.register(AzurLaneConfig.flush_all)
+
+
 class ConfigBackup:
     def __init__(self, config):
         """
@@ -388,6 +388,93 @@ class ConfigGenerator:
         self.generate_deploy_template()
 
 
+class ConfigSchema:
+    """
+    `args.json` compiled into a flat list of arguments grouped by task and group,
+    so updating a config is a single pass without deep_get/deep_set on each argument.
+    """
+    # Key: filepath. Value: (file stat, ConfigSchema)
+    _cache = {}
+
+    def __init__(self, args):
+        """
+        Args:
+            args (dict): Content of args.json
+        """
+        self.args = args
+        # [(task, [(group, [(arg, data, force_default, default, default_mutable), ...]), ...]), ...]
+        self.tasks = []
+        for task, groups in args.items():
+            compiled_groups = []
+            for group, arguments in groups.items():
+                compiled_args = []
+                for arg, data in arguments.items():
+                    force_default = data['type'] == 'lock' or data.get('display') == 'hide'
+                    default = parse_value(data['value'], data=data)
+                    default_mutable = isinstance(default, (list, dict))
+                    compiled_args.append((arg, data, force_default, default, default_mutable))
+                compiled_groups.append((group, compiled_args))
+            self.tasks.append((task, compiled_groups))
+
+    @classmethod
+    def from_file(cls, file):
+        """
+        Compile once, re-compile only if file changed.
+
+        Args:
+            file (str): Filepath to args.json
+
+        Returns:
+            ConfigSchema:
+        """
+        try:
+            stat = os.stat(file)
+            stat = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            stat = (0, 0)
+        cached = cls._cache.get(file)
+        if cached is not None and cached[0] == stat:
+            return cached[1]
+        schema = cls(read_file(file))
+        cls._cache[file] = (stat, schema)
+        return schema
+
+    def update(self, old, is_template=False):
+        """
+        Same as validating every argument with:
+            value = deep_get(old, keys=keys, default=data['value'])
+            if is_template or value is None or value == '' or data['type'] == 'lock' or data.get('display') == 'hide':
+                value = data['value']
+            value = parse_value(value, data=data)
+
+        Args:
+            old (dict):
+            is_template (bool):
+
+        Returns:
+            dict:
+        """
+        new = {}
+        for task, groups in self.tasks:
+            old_task = old.get(task) if not is_template else None
+            if not isinstance(old_task, dict):
+                old_task = {}
+            new_task = new[task] = {}
+            for group, arguments in groups:
+                old_group = old_task.get(group)
+                if not isinstance(old_group, dict):
+                    old_group = {}
+                new_group = new_task[group] = {}
+                for arg, data, force_default, default, default_mutable in arguments:
+                    value = old_group.get(arg)
+                    if force_default or value is None or value == '':
+                        value = deepcopy(default) if default_mutable else default
+                    else:
+                        value = parse_value(value, data=data)
+                    new_group[arg] = value
+        return new
+
+
 class ConfigUpdater:
     # source, target, (optional)convert_func
     redirection = [
@@ -395,7 +482,11 @@ class ConfigUpdater:
 
     @cached_property
     def args(self):
-        return read_file(filepath_args())
+        return self.schema.args
+
+    @property
+    def schema(self) -> ConfigSchema:
+        return ConfigSchema.from_file(filepath_args())
 
     def config_update(self, old, is_template=False):
         """
@@ -406,18 +497,7 @@ class ConfigUpdater:
         Returns:
             dict:
         """
-        new = {}
-
-        def deep_load(keys):
-            data = deep_get(self.args, keys=keys, default={})
-            value = deep_get(old, keys=keys, default=data['value'])
-            if is_template or value is None or value == '' or data['type'] == 'lock' or data.get('display') == 'hide':
-                value = data['value']
-            value = parse_value(value, data=data)
-            deep_set(new, keys=keys, value=value)
-
-        for path, _ in deep_iter(self.args, depth=3):
-            deep_load(path)
+        new = self.schema.update(old, is_template=is_template)
 
         if not is_template:
             new = self.config_redirect(old, new)
@@ -20,6 +20,18 @@ class ConfigWatcher:
         mtime = datetime.fromtimestamp(timestamp).replace(microsecond=0)
         return mtime
 
+    def get_file_stat(self) -> tuple:
+        """
+        Returns:
+            tuple[int, int]: Modify time in nanoseconds and file size.
+                Precise enough to detect external modifications between two writes.
+        """
+        try:
+            stat = os.stat(filepath_config(self.config_name))
+        except FileNotFoundError:
+            return 0, 0
+        return stat.st_mtime_ns, stat.st_size
+
     def should_reload(self) -> bool:
         """
         Returns:
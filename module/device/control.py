@@ -1,6 +1,12 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
 from module.base.button import ClickButton
 from module.base.decorator import cached_property
 from module.base.timer import Timer
+from module.base.trace import TRACER, trace
 from module.base.utils import *
 from module.device.method.hermit import Hermit
 from module.device.method.maatouch import MaaTouch
@@ -9,11 +15,151 @@ from module.device.method.scrcpy import Scrcpy
 from module.logger import logger
 
 
+class TouchQueue:
+    """
+    Play touch gestures in a worker thread, one after another in submitted order.
+
+    Gestures keep their own timing, sleeps inside a gesture and the delay after it run in the worker,
+    so the automation thread can go on detecting while the touch is playing.
+    If a gesture failed, gestures queued after it are cancelled,
+    and the error is raised on the next `submit()` or `wait()`.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread: threading.Thread = None
+        self._lock = threading.Lock()
+        self._last: Future = None
+        self._error: BaseException = None
+
+    def submit(self, func, *args, **kwargs) -> Future:
+        """
+        Args:
+            func: A gesture, such as `click_minitouch`
+            *args:
+            **kwargs:
+
+        Returns:
+            Future: Completion handle of the gesture
+        """
+        self.raise_error()
+        future = Future()
+        self._queue.put((func, args, kwargs, future))
+        self._last = future
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name='TouchQueue', daemon=True)
+                self._thread.start()
+        return future
+
+    @property
+    def pending(self) -> bool:
+        return self._last is not None and not self._last.done()
+
+    def wait(self):
+        """
+        Block until all submitted gestures are played.
+
+        Raises:
+            Exception: Error of the first failed gesture
+        """
+        last = self._last
+        if last is not None:
+            try:
+                last.result()
+            except BaseException:
+                # Cancelled or failed, the actual error is in self._error
+                pass
+        self.raise_error()
+
+    def raise_error(self):
+        error = self._error
+        if error is not None:
+            self._error = None
+            raise error
+
+    def _loop(self):
+        while 1:
+            func, args, kwargs, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                self._error = e
+                future.set_exception(e)
+                # Following gestures are based on this one, drop them
+                while 1:
+                    try:
+                        _, _, _, dropped = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    dropped.cancel()
+
+
 class Control(Hermit, Minitouch, Scrcpy, MaaTouch):
+    # Time of the last click or swipe finished
+    last_control_time = 0.
+    # Control methods that play gestures in `touch_queue`.
+    # They talk to a socket and sleep after sending, other methods are blocking calls anyway.
+    touch_queue_methods = ['minitouch', 'scrcpy', 'MaaTouch']
+
     def handle_control_check(self, button):
         # Will be overridden in Device
         pass
 
+    def control_finish(self):
+        """
+        Call after a control action, screenshots captured before are outdated.
+        """
+        self.last_control_time = time.time()
+
+    @cached_property
+    def touch_queue(self) -> TouchQueue:
+        return TouchQueue()
+
+    def _touch_play(self, name, func, *args, **kwargs):
+        with TRACER.span(name, cat='touch'):
+            func(*args, **kwargs)
+        self.control_finish()
+
+    def touch_run(self, func, *args, **kwargs):
+        """
+        Run a gesture. If current control method is in `touch_queue_methods`,
+        gesture is queued and this method returns immediately,
+        `control_finish()` will be called when gesture is actually played.
+
+        Args:
+            func: A gesture, such as `click_minitouch`
+            *args:
+            **kwargs:
+
+        Returns:
+            Future: Completion handle of the gesture
+        """
+        name = func.__name__
+        if self.config.Emulator_ControlMethod in self.touch_queue_methods:
+            return self.touch_queue.submit(self._touch_play, name, func, *args, **kwargs)
+
+        future = Future()
+        self._touch_play(name, func, *args, **kwargs)
+        future.set_result(None)
+        return future
+
+    def touch_wait(self):
+        """
+        Block until queued gestures are played.
+        Call before anything that needs the result of controls, like taking screenshots.
+        """
+        if 'touch_queue' not in self.__dict__:
+            return
+        if self.touch_queue.pending:
+            with TRACER.span('Control.touch_wait', cat='control'):
+                self.touch_queue.wait()
+        else:
+            self.touch_queue.raise_error()
+
     @cached_property
     def click_methods(self):
         return {
@@ -24,6 +170,7 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch):
             'MaaTouch': self.click_maatouch,
         }
 
+    @trace(cat='control', detail=1)
     def click(self, button, control_check=True):
         """Method to click a button.
 
@@ -42,7 +189,7 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch):
             self.config.Emulator_ControlMethod,
             self.click_adb
         )
-        method(x, y)
+        self.touch_run(method, x, y)
 
     def multi_click(self, button, n, interval=(0.1, 0.2)):
         self.handle_control_check(button)
@@ -55,6 +202,7 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch):
 
             self.click(button, control_check=False)
 
+    @trace(cat='control', detail=1)
     def long_click(self, button, duration=(1, 1.2)):
         """Method to long click a button.
 
@@ -71,16 +219,17 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch):
         )
         method = self.config.Emulator_ControlMethod
         if method == 'minitouch':
-            self.long_click_minitouch(x, y, duration)
+            self.touch_run(self.long_click_minitouch, x, y, duration)
         elif method == 'uiautomator2':
-            self.long_click_uiautomator2(x, y, duration)
+            self.touch_run(self.long_click_uiautomator2, x, y, duration)
         elif method == 'scrcpy':
-            self.long_click_scrcpy(x, y, duration)
+            self.touch_run(self.long_click_scrcpy, x, y, duration)
         elif method == 'MaaTouch':
-            self.long_click_maatouch(x, y, duration)
+            self.touch_run(self.long_click_maatouch, x, y, duration)
         else:
-            self.swipe_adb((x, y), (x, y), duration)
+            self.touch_run(self.swipe_adb, (x, y), (x, y), duration)
 
+    @trace(cat='control')
     def swipe(self, p1, p2, duration=(0.1, 0.2), name='SWIPE', distance_check=True):
         self.handle_control_check(name)
         p1, p2 = ensure_int(p1, p2)
@@ -107,15 +256,15 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch):
                 return
 
         if method == 'minitouch':
-            self.swipe_minitouch(p1, p2)
+            self.touch_run(self.swipe_minitouch, p1, p2)
         elif method == 'uiautomator2':
-            self.swipe_uiautomator2(p1, p2, duration=duration)
+            self.touch_run(self.swipe_uiautomator2, p1, p2, duration=duration)
         elif method == 'scrcpy':
-            self.swipe_scrcpy(p1, p2)
+            self.touch_run(self.swipe_scrcpy, p1, p2)
         elif method == 'MaaTouch':
-            self.swipe_maatouch(p1, p2)
+            self.touch_run(self.swipe_maatouch, p1, p2)
         else:
-            self.swipe_adb(p1, p2, duration=duration)
+            self.touch_run(self.swipe_adb, p1, p2, duration=duration)
 
     def swipe_vector(self, vector, box=(123, 159, 1175, 628), random_range=(0, 0, 0, 0), padding=15,
                      duration=(0.1, 0.2), whitelist_area=None, blacklist_area=None, name='SWIPE', distance_check=True):
@@ -145,6 +294,7 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch):
         )
         self.swipe(p1, p2, duration=duration, name=name, distance_check=distance_check)
 
+    @trace(cat='control')
     def drag(self, p1, p2, segments=1, shake=(0, 15), point_random=(-10, -10, 10, 10), shake_random=(-5, -5, 5, 5),
              swipe_duration=0.25, shake_duration=0.1, name='DRAG'):
         self.handle_control_check(name)
@@ -154,15 +304,16 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch):
         )
         method = self.config.Emulator_ControlMethod
         if method == 'minitouch':
-            self.drag_minitouch(p1, p2, point_random=point_random)
+            self.touch_run(self.drag_minitouch, p1, p2, point_random=point_random)
         elif method == 'uiautomator2':
-            self.drag_uiautomator2(
+            self.touch_run(
+                self.drag_uiautomator2,
                 p1, p2, segments=segments, shake=shake, point_random=point_random, shake_random=shake_random,
                 swipe_duration=swipe_duration, shake_duration=shake_duration)
         elif method == 'scrcpy':
-            self.drag_scrcpy(p1, p2, point_random=point_random)
+            self.touch_run(self.drag_scrcpy, p1, p2, point_random=point_random)
         elif method == 'MaaTouch':
-            self.drag_maatouch(p1, p2, point_random=point_random)
+            self.touch_run(self.drag_maatouch, p1, p2, point_random=point_random)
         else:
             logger.warning(f'Control method {method} does not support drag well, '
                            f'falling back to ADB swipe may cause unexpected behaviour')
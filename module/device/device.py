@@ -2,6 +2,7 @@ import sys
 from collections import deque
 
 from module.base.timer import Timer
+from module.base.trace import trace
 from module.device.app_control import AppControl
 from module.device.control import Control
 from module.device.screenshot import Screenshot
@@ -46,12 +47,19 @@ class Device(Screenshot, Control, AppControl, Platform):
 
         # Auto-select the fastest screenshot method
         if not self.config.is_template_config and self.config.Emulator_ScreenshotMethod == 'auto':
-            self.run_simple_screenshot_benchmark()
+            # Keep `auto` in user config, so it's benchmarked again on next start
+            self.run_simple_screenshot_benchmark(save=False)
+            # Keep re-evaluating during runtime
+            self.screenshot_auto_tune_enable = True
 
-    def run_simple_screenshot_benchmark(self):
+    def run_simple_screenshot_benchmark(self, save=True):
         """
         Perform a screenshot method benchmark, test 3 times on each method.
         The fastest one will be set into config.
+
+        Args:
+            save: True to save the fastest method into user config,
+                False to use it in current run only.
         """
         logger.info('run_simple_screenshot_benchmark')
         # Check resolution first
@@ -61,32 +69,46 @@ class Device(Screenshot, Control, AppControl, Platform):
         bench = Benchmark(config=self.config, device=self)
         method = bench.run_simple_screenshot_benchmark()
         # Set
-        self.config.Emulator_ScreenshotMethod = method
+        if save:
+            self.config.Emulator_ScreenshotMethod = method
+        else:
+            self.config.override(Emulator_ScreenshotMethod=method)
 
+    @trace(cat='device')
     def screenshot(self):
         """
         Returns:
             np.ndarray:
         """
         self.stuck_record_check()
+        # Screenshots should be taken after queued touches played
+        self.touch_wait()
 
         try:
             super().screenshot()
         except RequestHumanTakeover:
             if not self.ascreencap_available:
                 logger.error('aScreenCap unavailable on current device, fallback to auto')
-                self.run_simple_screenshot_benchmark()
+                self.run_simple_screenshot_benchmark(save=not self.screenshot_auto_tune_enable)
                 super().screenshot()
             else:
                 raise
 
         return self.image
 
+    def screenshot_auto_tune_run(self):
+        # Don't probe while queued touches are playing
+        self.touch_wait()
+        super().screenshot_auto_tune_run()
+
     def release_during_wait(self):
+        self.touch_wait()
         # Scrcpy server is still sending video stream,
         # stop it during wait
         if self.config.Emulator_ScreenshotMethod == 'scrcpy':
             self._scrcpy_server_stop()
+        # Prefetched frame will be outdated after wait
+        self.screenshot_prefetch_stop()
 
     def stuck_record_add(self, button):
         self.detect_record.add(str(button))
@@ -178,11 +200,13 @@ class Device(Screenshot, Control, AppControl, Platform):
         self.stuck_record_check = empty_function
 
     def app_start(self):
+        self.touch_wait()
         super().app_start()
         self.stuck_record_clear()
         self.click_record_clear()
 
     def app_stop(self):
+        self.touch_wait()
         super().app_stop()
         self.stuck_record_clear()
         self.click_record_clear()
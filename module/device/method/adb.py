@@ -10,7 +10,7 @@ from lxml import etree
 from module.base.decorator import Config
 from module.device.connection import Connection
 from module.device.method.utils import (RETRY_TRIES, retry_sleep, remove_prefix, handle_adb_error,
-                                        ImageTruncated, PackageNotInstalled)
+                                        ImageTruncated, PackageNotInstalled, recv_into)
 from module.exception import RequestHumanTakeover, ScriptError
 from module.logger import logger
 
@@ -104,6 +104,17 @@ class Adb(Connection):
     __screenshot_method = [0, 1, 2]
     __screenshot_method_fixed = [0, 1, 2]
 
+    # A long-lived shell running `screencap` once per line received,
+    # frames are received into `_screencap_buffer` which is reused.
+    _screencap_stream = None
+    _screencap_stream_storage = None
+    _screencap_buffer: bytearray = None
+    # Header of raw screencap, 12 bytes or 16 bytes on Android >= 9
+    _screencap_header_size = 0
+    _screencap_shape = (0, 0)
+    # False if raw data is mangled by shell, fallback to `screencap -p`
+    _screencap_stream_available = True
+
     @staticmethod
     def __load_screenshot(screenshot, method):
         if method == 0:
@@ -148,9 +159,94 @@ class Adb(Connection):
             logger.warning(f'Unexpected screenshot: {screenshot}')
         raise OSError(f'cannot load screenshot')
 
+    def screencap_stream_init(self):
+        """
+        Measure raw screencap layout, then start a shell that runs `screencap` on every newline.
+
+        Returns:
+            bool: If stream available
+        """
+        logger.info('Screencap stream init')
+        self.screencap_stream_release()
+
+        # One-shot screencap to get the header size
+        data = self.adb_shell(['screencap'], stream=True)
+        if len(data) < 500:
+            logger.warning(f'Unexpected screenshot: {data}')
+            raise ImageTruncated('Unexpected screenshot')
+        width, height = np.frombuffer(data[0:8], dtype=np.uint32)
+        width, height = int(width), int(height)
+        header_size = len(data) - width * height * 4
+        if header_size not in [12, 16]:
+            # Shell converts `\n` to `\r\n` on old devices, raw data can't be framed
+            logger.warning(f'Unexpected raw screencap size: {len(data)}, header: {header_size}, '
+                           f'fallback to screencap -p')
+            self._screencap_stream_available = False
+            return False
+
+        stream = self.adb_shell(
+            'while read -r _; do screencap 2>/dev/null; done',
+            stream=True,
+            recvall=False
+        )
+        # Prevent shell stream from being deleted causing socket close
+        self._screencap_stream_storage = stream
+        stream = stream.conn
+        stream.settimeout(10)
+        self._screencap_stream = stream
+        self._screencap_header_size = header_size
+        self._screencap_shape = (height, width)
+        self._screencap_buffer = bytearray(header_size + width * height * 4)
+        logger.info(f'Screencap stream started, size: {width}x{height}, header: {header_size}')
+        return True
+
+    def screencap_stream_release(self):
+        if self._screencap_stream is not None:
+            try:
+                self._screencap_stream.close()
+            except Exception as e:
+                logger.warning(f'Failed to close screencap stream: {e}')
+        self._screencap_stream = None
+        self._screencap_stream_storage = None
+        self._screencap_buffer = None
+
+    def screencap_stream(self):
+        """
+        Returns:
+            np.ndarray: Screenshot in RGB, or None if screencap stream is unavailable
+        """
+        if self._screencap_stream is None:
+            if not self._screencap_stream_available or not self.screencap_stream_init():
+                return None
+
+        try:
+            self._screencap_stream.sendall(b'\n')
+            data = recv_into(self._screencap_stream, self._screencap_buffer)
+            height, width = self._screencap_shape
+            header = np.frombuffer(data[0:8], dtype=np.uint32)
+            if header[0] != width or header[1] != height:
+                # Resolution or orientation changed, re-measure in the next trial
+                raise ImageTruncated(f'Unexpected screencap header: {header.tolist()}, expected: {width}x{height}')
+            image = np.frombuffer(data, dtype=np.uint8, offset=self._screencap_header_size)
+            image = image.reshape(height, width, 4)
+        except Exception:
+            self.screencap_stream_release()
+            raise
+
+        # screencap sends an RGBA image, drop alpha into a new array
+        # since the buffer is overwritten by the next frame
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        if image is None:
+            raise ImageTruncated('Empty image after cv2.cvtColor')
+        return image
+
     @retry
     @Config.when(DEVICE_OVER_HTTP=False)
     def screenshot_adb(self):
+        image = self.screencap_stream()
+        if image is not None:
+            return image
+
         data = self.adb_shell(['screencap', '-p'], stream=True)
         if len(data) < 500:
             logger.warning(f'Unexpected screenshot: {data}')
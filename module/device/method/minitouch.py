@@ -3,12 +3,14 @@ import json
 import socket
 import time
 from functools import wraps
-from typing import List
+from typing import List, TYPE_CHECKING
 
-import websockets
 from adbutils.errors import AdbError
 from uiautomator2 import _Service
 
+if TYPE_CHECKING:
+    import websockets
+
 from module.base.decorator import Config, cached_property, del_cached_property
 from module.base.timer import Timer
 from module.base.utils import *
@@ -354,7 +356,7 @@ class Minitouch(Connection):
     _minitouch_port: int = 0
     _minitouch_client: socket.socket
     _minitouch_pid: int
-    _minitouch_ws: websockets.WebSocketClientProtocol
+    _minitouch_ws: 'websockets.WebSocketClientProtocol'
     max_x: int
     max_y: int
 
@@ -458,6 +460,8 @@ class Minitouch(Connection):
         Raises:
             MinitouchOccupiedError
         """
+        # Websockets are only used when DEVICE_OVER_HTTP, import on first use
+        import websockets
         try:
             return self._minitouch_loop.run_until_complete(event)
         except websockets.ConnectionClosedError as e:
@@ -495,6 +499,7 @@ class Minitouch(Connection):
         logger.attr('Minitouch', url)
 
         async def connect():
+            import websockets
             ws = await websockets.connect(url)
             # start @minitouch service
             logger.info(await ws.recv())
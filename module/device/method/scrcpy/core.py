@@ -1,3 +1,4 @@
+import selectors
 import socket
 import struct
 import threading
@@ -28,8 +29,11 @@ class ScrcpyCore(Connection):
     Module from https://github.com/leng-yue/py-scrcpy-client
     """
 
-    _scrcpy_last_frame: t.Optional[np.ndarray] = None
+    # Latest decoded frame in `av.VideoFrame`, converted to RGB only when a screenshot is requested
+    _scrcpy_last_frame = None
     _scrcpy_last_frame_time: float = 0.
+    # Notified when a new frame is decoded
+    _scrcpy_frame_condition = threading.Condition()
 
     _scrcpy_alive = False
     _scrcpy_server_stream: t.Optional[AdbConnection] = None
@@ -191,26 +195,48 @@ class ScrcpyCore(Connection):
             raise RequestHumanTakeover
 
         codec = CodecContext.create("h264", "r")
-        while self._scrcpy_alive:
-            try:
-                raw_h264 = self._scrcpy_video_socket.recv(0x10000)
-                if raw_h264 == b"":
-                    raise ScrcpyError("Video stream is disconnected")
-                packets = codec.parse(raw_h264)
-                for packet in packets:
-                    frames = codec.decode(packet)
-                    for frame in frames:
-                        # logger.info('frame received')
-                        frame = frame.to_ndarray(format="rgb24")
-                        self._scrcpy_last_frame = frame
-                        self._scrcpy_last_frame_time = time.time()
-                        self._scrcpy_resolution = (frame.shape[1], frame.shape[0])
-            except (BlockingIOError, InvalidDataError):
-                # only return nonempty frames, may block cv2 render thread
-                time.sleep(0.001)
-            except (ConnectionError, OSError) as e:  # Socket Closed
-                if self._scrcpy_alive:
-                    logger.error(f'_scrcpy_stream_loop_thread: {repr(e)}')
-                    raise
+        # Wait for video data instead of polling the non-blocking socket
+        selector = selectors.DefaultSelector()
+        selector.register(self._scrcpy_video_socket, selectors.EVENT_READ)
+        try:
+            while self._scrcpy_alive:
+                try:
+                    if not selector.select(timeout=0.1):
+                        continue
+                    raw_h264 = self._scrcpy_video_socket.recv(0x10000)
+                    if raw_h264 == b"":
+                        raise ScrcpyError("Video stream is disconnected")
+                    packets = codec.parse(raw_h264)
+                    for packet in packets:
+                        frames = codec.decode(packet)
+                        for frame in frames:
+                            # logger.info('frame received')
+                            # Frames must be decoded to keep the H.264 stream going,
+                            # but RGB conversion is deferred to `_scrcpy_frame_to_ndarray()`
+                            with self._scrcpy_frame_condition:
+                                self._scrcpy_last_frame = frame
+                                self._scrcpy_last_frame_time = time.time()
+                                self._scrcpy_resolution = (frame.width, frame.height)
+                                self._scrcpy_frame_condition.notify_all()
+                except (BlockingIOError, InvalidDataError):
+                    # only return nonempty frames, may block cv2 render thread
+                    continue
+                except (ConnectionError, OSError, ValueError) as e:  # Socket Closed
+                    if self._scrcpy_alive:
+                        logger.error(f'_scrcpy_stream_loop_thread: {repr(e)}')
+                        raise
+        finally:
+            selector.close()
 
         raise ScrcpyError('_scrcpy_stream_loop stopped')
+
+    @staticmethod
+    def _scrcpy_frame_to_ndarray(frame) -> np.ndarray:
+        """
+        Args:
+            frame (av.VideoFrame):
+
+        Returns:
+            np.ndarray: A new RGB image, owned by the caller
+        """
+        return frame.to_ndarray(format="rgb24")
@@ -83,13 +83,17 @@ class Scrcpy(ScrcpyCore, Uiautomator2):
         with self._scrcpy_control_socket_lock:
             # Wait new frame
             now = time.time()
-            while 1:
-                time.sleep(0.001)
-                if self._scrcpy_stream_loop_thread is None or not self._scrcpy_stream_loop_thread.is_alive():
-                    raise ScrcpyError('_scrcpy_stream_loop_thread died')
-                if self._scrcpy_last_frame_time > now:
-                    screenshot = self._scrcpy_last_frame.copy()
-                    return screenshot
+            with self._scrcpy_frame_condition:
+                while 1:
+                    if self._scrcpy_stream_loop_thread is None or not self._scrcpy_stream_loop_thread.is_alive():
+                        raise ScrcpyError('_scrcpy_stream_loop_thread died')
+                    if self._scrcpy_last_frame_time > now:
+                        frame = self._scrcpy_last_frame
+                        break
+                    self._scrcpy_frame_condition.wait(timeout=0.1)
+
+            # Convert outside the condition, so the stream loop can keep decoding
+            return self._scrcpy_frame_to_ndarray(frame)
 
     @retry
     def click_scrcpy(self, x, y):
@@ -107,6 +107,39 @@ def recv_all(stream, chunk_size=4096, recv_interval=0.000) -> bytes:
         raise AdbTimeout('adb read timeout')
 
 
+def recv_into(stream, buffer, size=None):
+    """
+    Receive exactly `size` bytes into a preallocated buffer, without joining fragments.
+
+    Args:
+        stream: socket or AdbConnection
+        buffer (bytearray, memoryview):
+        size (int): Bytes to receive, default to the length of buffer
+
+    Returns:
+        memoryview: View of the received bytes
+
+    Raises:
+        AdbTimeout:
+        ConnectionResetError: If stream closed before receiving enough data
+    """
+    if isinstance(stream, AdbConnection):
+        stream = stream.conn
+    view = memoryview(buffer)
+    if size is None:
+        size = len(view)
+    received = 0
+    try:
+        while received < size:
+            n = stream.recv_into(view[received:size])
+            if not n:
+                raise ConnectionResetError(f'Stream closed after receiving {received}/{size} bytes')
+            received += n
+    except socket.timeout:
+        raise AdbTimeout('adb read timeout')
+    return view[:size]
+
+
 def possible_reasons(*args):
     """
     Show possible reasons
@@ -0,0 +1,365 @@
+import json
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from module.base.timer import Timer
+from module.base.trace import trace
+from module.base.utils import ensure_int, load_image, point2str, point_in_area, random_rectangle_point, save_image
+from module.config.config import AzurLaneConfig
+from module.device.device import Device
+from module.exception import ScriptError
+from module.logger import logger
+
+REPLAY_CONTROLS = ['click', 'long_click', 'swipe', 'drag']
+
+
+class ReplayEnd(Exception):
+    """
+    Replay reached the end of recorded session.
+    """
+    pass
+
+
+class ReplayDiverged(ReplayEnd):
+    """
+    Script didn't make the recorded controls, replay can't go on.
+    """
+    pass
+
+
+class ReplaySession:
+    """
+    Screenshots and controls recorded from a real device.
+
+    Folder layout:
+        session.json: {
+            "frames": ["00000.png", ...],
+            "events": [{"frame": 3, "type": "click", "area": [x1, y1, x2, y2], "name": "MAIN_GOTO_MENU"}, ...]
+        }
+        00000.png, 00001.png, ...
+
+    An event at frame N means the control was made after frame N was captured, and before frame N + 1.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.frames = []
+        self.events = []
+
+    @property
+    def file(self):
+        return os.path.join(self.folder, 'session.json')
+
+    @classmethod
+    def load(cls, folder):
+        """
+        Args:
+            folder (str):
+
+        Returns:
+            ReplaySession:
+
+        Raises:
+            ScriptError: If session is empty
+        """
+        session = cls(folder)
+        with open(session.file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        session.frames = data.get('frames', [])
+        session.events = data.get('events', [])
+        if not session.frames:
+            raise ScriptError(f'Replay session {folder} has no frames')
+        logger.info(f'Replay session loaded: {folder}, '
+                    f'frames: {len(session.frames)}, events: {len(session.events)}')
+        return session
+
+    def save(self):
+        os.makedirs(self.folder, exist_ok=True)
+        with open(self.file, 'w', encoding='utf-8') as f:
+            json.dump({'frames': self.frames, 'events': self.events}, f, indent=2)
+
+    def frame_file(self, index):
+        return os.path.join(self.folder, self.frames[index])
+
+    def events_at(self, index):
+        """
+        Args:
+            index (int): Frame index
+
+        Returns:
+            list[dict]: Controls made on this frame, in order
+        """
+        return [event for event in self.events if event['frame'] == index]
+
+
+class ReplayRecorder:
+    """
+    Record screenshots and controls of a real device into a `ReplaySession`.
+
+    Examples:
+        recorder = ReplayRecorder(device, './log/replay/dungeon')
+        recorder.start()
+        try:
+            Dungeon(config, device=device).run()
+        finally:
+            recorder.stop()
+    """
+
+    def __init__(self, device, folder):
+        """
+        Args:
+            device (Device):
+            folder (str):
+        """
+        self.device = device
+        self.session = ReplaySession(folder)
+        # Write PNG in background, so recording doesn't slow down the task too much
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ReplayRecorder')
+        # Controls made inside another control, such as a click inside drag, are not recorded
+        self._control_depth = 0
+
+    def start(self):
+        os.makedirs(self.session.folder, exist_ok=True)
+        origin_screenshot = self.device.screenshot
+
+        def screenshot():
+            image = origin_screenshot()
+            file = f'{len(self.session.frames):05d}.png'
+            self.session.frames.append(file)
+            self.executor.submit(save_image, image.copy(), os.path.join(self.session.folder, file))
+            return image
+
+        self.device.screenshot = screenshot
+        for control in REPLAY_CONTROLS:
+            self.device.__setattr__(control, self._wrap_control(control, self.device.__getattribute__(control)))
+        logger.info(f'Replay recording started: {self.session.folder}')
+        return self
+
+    def _wrap_control(self, control, func):
+        def wrapper(*args, **kwargs):
+            if self._control_depth == 0:
+                event = {'frame': max(len(self.session.frames) - 1, 0), 'type': control}
+                if control in ['click', 'long_click']:
+                    button = kwargs.get('button', args[0] if args else None)
+                    event['area'] = [int(x) for x in button.button]
+                    event['name'] = str(button)
+                self.session.events.append(event)
+            self._control_depth += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._control_depth -= 1
+
+        return wrapper
+
+    def stop(self):
+        # Restore methods of the device class
+        for name in ['screenshot'] + REPLAY_CONTROLS:
+            self.device.__dict__.pop(name, None)
+        self.executor.shutdown(wait=True)
+        self.session.save()
+        logger.info(f'Replay recording saved: {self.session.folder}, '
+                    f'frames: {len(self.session.frames)}, events: {len(self.session.events)}')
+
+
+class ReplayDevice(Device):
+    """
+    A `Device` that serves screenshots from a recorded session, no emulator needed.
+
+    Frames are served in recorded order. If controls were recorded on a frame,
+    replay stays on that frame until the script makes the same controls,
+    clicks must land in the recorded button area.
+    `ReplayEnd` is raised after the last frame is served `end_tolerance` times.
+    `ReplayDiverged` is raised if script stays on a frame without making the recorded controls,
+    for more than `diverge_tolerance` screenshots and `diverge_seconds`.
+    """
+    # Number of screenshots allowed on the last frame before ending replay
+    end_tolerance = 10
+    # Screenshots and seconds allowed on a frame that waits for controls.
+    # Both are required, script may wait on a timer and screenshots are taken without interval in replay.
+    diverge_tolerance = 100
+    diverge_seconds = 5
+    # Padding of recorded click areas
+    click_threshold = 5
+    # Number of decoded frames to keep
+    frame_cache_size = 16
+
+    def __init__(self, config, session):
+        """
+        Args:
+            config (AzurLaneConfig, str):
+            session (ReplaySession, str): Session or its folder
+        """
+        # Device.__init__() is not called, there's no emulator to connect
+        if isinstance(config, str):
+            config = AzurLaneConfig(config, task=None)
+        self.config = config
+        self.config.DEVICE_OVER_HTTP = False
+        self.serial = 'replay'
+        self.package = self.config.Emulator_PackageName
+        if not isinstance(session, ReplaySession):
+            session = ReplaySession.load(session)
+        self.session = session
+
+        self.frame_index = 0
+        self._frame_cache = OrderedDict()
+        self._pending = deque(self.session.events_at(0))
+        self._advance = False
+        self._end_count = 0
+        self._stay_count = 0
+        self._stay_timer = Timer(self.diverge_seconds).start()
+        self.control_hit = 0
+        self.control_miss = 0
+
+        # No emulator to protect, take screenshots as fast as possible
+        self._screenshot_interval = Timer(0)
+        self._screen_size_checked = True
+        self._screen_black_checked = True
+
+    @property
+    def frame_last(self):
+        return len(self.session.frames) - 1
+
+    def frame(self, index):
+        """
+        Args:
+            index (int):
+
+        Returns:
+            np.ndarray: Decoded frame, cached
+        """
+        image = self._frame_cache.get(index)
+        if image is None:
+            image = load_image(self.session.frame_file(index))
+            self._frame_cache[index] = image
+            if len(self._frame_cache) > self.frame_cache_size:
+                self._frame_cache.popitem(last=False)
+        else:
+            self._frame_cache.move_to_end(index)
+        return image
+
+    def preload(self):
+        """
+        Decode all frames in advance, so benchmarks measure the script only.
+        """
+        self.frame_cache_size = len(self.session.frames)
+        for index in range(len(self.session.frames)):
+            self.frame(index)
+
+    def _screenshot_capture(self):
+        if self._advance:
+            self._advance = False
+            self.frame_index += 1
+            self._pending = deque(self.session.events_at(self.frame_index))
+            self._stay_reset()
+
+        if self._pending:
+            self._stay_count += 1
+            if self._stay_count > self.diverge_tolerance and self._stay_timer.reached():
+                raise ReplayDiverged(f'Replay diverged at frame {self.frame_index}, '
+                                     f'script did not make the recorded control: {self._pending[0]}')
+
+        if self.frame_index >= self.frame_last:
+            self._end_count += 1
+            if self._end_count > self.end_tolerance:
+                raise ReplayEnd(f'Replay ended at frame {self.frame_index}')
+        elif not self._pending:
+            self._advance = True
+
+        return self.frame(self.frame_index).copy()
+
+    def _stay_reset(self):
+        self._stay_count = 0
+        self._stay_timer.reset()
+
+    def replay_control(self, control, point=None):
+        """
+        Args:
+            control (str): click, long_click, swipe, drag
+            point (tuple[int, int]): Point of click
+
+        Returns:
+            bool: If control matches the recorded one
+        """
+        if self._pending:
+            event = self._pending[0]
+            if event['type'] == control and (
+                    point is None or point_in_area(point, event['area'], threshold=self.click_threshold)):
+                self._pending.popleft()
+                self.control_hit += 1
+                self._stay_reset()
+                if not self._pending and self.frame_index < self.frame_last:
+                    self._advance = True
+                return True
+
+        self.control_miss += 1
+        expected = self._pending[0] if self._pending else None
+        logger.warning(f'Replay {control} missed on frame {self.frame_index}, expected: {expected}')
+        return False
+
+    @trace(cat='control', detail=1)
+    def click(self, button, control_check=True):
+        if control_check:
+            self.handle_control_check(button)
+        x, y = random_rectangle_point(button.button)
+        x, y = ensure_int(x, y)
+        logger.info('Click %s @ %s' % (point2str(x, y), button))
+        self.replay_control('click', point=(x, y))
+        self.control_finish()
+
+    @trace(cat='control', detail=1)
+    def long_click(self, button, duration=(1, 1.2)):
+        self.handle_control_check(button)
+        x, y = random_rectangle_point(button.button)
+        x, y = ensure_int(x, y)
+        logger.info('Long click %s @ %s' % (point2str(x, y), button))
+        self.replay_control('long_click', point=(x, y))
+        self.control_finish()
+
+    @trace(cat='control')
+    def swipe(self, p1, p2, duration=(0.1, 0.2), name='SWIPE', distance_check=True):
+        self.handle_control_check(name)
+        p1, p2 = ensure_int(p1, p2)
+        logger.info('Swipe %s -> %s' % (point2str(*p1), point2str(*p2)))
+        self.replay_control('swipe')
+        self.control_finish()
+
+    @trace(cat='control')
+    def drag(self, p1, p2, segments=1, shake=(0, 15), point_random=(-10, -10, 10, 10), shake_random=(-5, -5, 5, 5),
+             swipe_duration=0.25, shake_duration=0.1, name='DRAG'):
+        self.handle_control_check(name)
+        p1, p2 = ensure_int(p1, p2)
+        logger.info('Drag %s -> %s' % (point2str(*p1), point2str(*p2)))
+        self.replay_control('drag')
+        self.control_finish()
+
+    def app_current_adb(self):
+        return self.package
+
+    def app_start_adb(self, *args, **kwargs):
+        logger.info('Replay: app start skipped')
+
+    def app_stop_adb(self, *args, **kwargs):
+        logger.info('Replay: app stop skipped')
+
+    def get_orientation(self):
+        self.orientation = 0
+        return 0
+
+    @staticmethod
+    def sleep(second):
+        # Recorded frames don't need time to load
+        pass
+
+    def screenshot_interval_set(self, interval=None):
+        pass
+
+    def screenshot_prefetch_available(self):
+        return False
+
+    def release_during_wait(self):
+        pass
+
+    def uninstall_minicap(self):
+        pass
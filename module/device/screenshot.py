@@ -1,6 +1,8 @@
+import hashlib
 import os
+import threading
 import time
-from collections import deque
+from collections import defaultdict, deque
 from datetime import datetime
 
 import cv2
@@ -9,16 +11,177 @@ from PIL import Image
 
 from module.base.decorator import cached_property
 from module.base.timer import Timer
-from module.base.utils import get_color, image_size, limit_in, save_image
+from module.base.trace import TRACER, trace
+from module.base.utils import crop, float2str, get_color, image_size, limit_in, save_image
 from module.device.method.adb import Adb
 from module.device.method.ascreencap import AScreenCap
 from module.device.method.droidcast import DroidCast
 from module.device.method.scrcpy import Scrcpy
 from module.device.method.wsa import WSA
 from module.exception import RequestHumanTakeover, ScriptError
+from module.handler.sensitive_info import handle_sensitive_image
 from module.logger import logger
 
 
+class ScreenshotTelemetry:
+    """
+    Rolling latency and failure records of each screenshot method.
+    """
+    # Number of recent screenshots to evaluate
+    window = 30
+
+    def __init__(self):
+        # Key: method name. Value: deque of costs in seconds, successful screenshots only
+        self.latency = defaultdict(lambda: deque(maxlen=self.window))
+        # Key: method name. Value: deque of bool, True for failure
+        self.failure = defaultdict(lambda: deque(maxlen=self.window))
+        self.total = defaultdict(int)
+
+    def record(self, method, cost):
+        self.latency[method].append(cost)
+        self.failure[method].append(False)
+        self.total[method] += 1
+
+    def record_failure(self, method):
+        self.failure[method].append(True)
+        self.total[method] += 1
+
+    def median(self, method):
+        """
+        Returns:
+            float: Median cost in recent screenshots, or None if no records
+        """
+        latency = self.latency.get(method)
+        if not latency:
+            return None
+        return float(np.median(latency))
+
+    def percentile(self, method, q):
+        latency = self.latency.get(method)
+        if not latency:
+            return None
+        return float(np.percentile(latency, q))
+
+    def failure_rate(self, method):
+        failure = self.failure.get(method)
+        if not failure:
+            return 0.
+        return sum(failure) / len(failure)
+
+    def is_healthy(self, method, max_failure_rate=0.2):
+        return self.failure_rate(method) <= max_failure_rate
+
+    def show(self):
+        for method in sorted(self.failure.keys()):
+            median = self.median(method)
+            if median is None:
+                logger.info(f'{method}: failure_rate={float2str(self.failure_rate(method))}, '
+                            f'total={self.total[method]}')
+                continue
+            logger.info(
+                f'{method}: median={float2str(median)}, p90={float2str(self.percentile(method, 90))}, '
+                f'failure_rate={float2str(self.failure_rate(method))}, total={self.total[method]}'
+            )
+
+
+class ScreenshotDeque:
+    """
+    Recent screenshots kept for error logs.
+
+    Frames are masked and encoded in a background thread,
+    a 1280x720 frame takes about 150KB as JPEG instead of 2.7MB as raw array.
+    """
+    # Extension and params of cv2.imencode()
+    encode_ext = '.jpg'
+    encode_params = [cv2.IMWRITE_JPEG_QUALITY, 90]
+    # Raw frames waiting to be encoded, older ones are dropped if encoding falls behind
+    pending_limit = 5
+
+    def __init__(self, maxlen):
+        # Each frame: {'time': datetime, 'data': bytes}
+        self.deque = deque(maxlen=maxlen)
+        self._pending = deque(maxlen=self.pending_limit)
+        self._event = threading.Event()
+        # Held while encoding, so frames are appended in order
+        self._encode_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._thread: threading.Thread = None
+
+    def __len__(self):
+        return len(self.deque) + len(self._pending)
+
+    def append(self, image_time, image):
+        """
+        Args:
+            image_time (datetime):
+            image (np.ndarray): Screenshot in RGB, will not be modified
+        """
+        self._pending.append((image_time, image))
+        self._event.set()
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._encode_loop, name='ScreenshotDeque', daemon=True)
+                self._thread.start()
+
+    def encode(self, image):
+        """
+        Args:
+            image (np.ndarray): Screenshot in RGB
+
+        Returns:
+            bytes: Encoded image, or None if failed
+        """
+        image = handle_sensitive_image(image.copy())
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+        ret, buf = cv2.imencode(self.encode_ext, image, self.encode_params)
+        if not ret:
+            return None
+        return buf.tobytes()
+
+    def _encode_one(self):
+        """
+        Returns:
+            bool: If encoded a frame
+        """
+        with self._encode_lock:
+            try:
+                image_time, image = self._pending.popleft()
+            except IndexError:
+                return False
+            try:
+                data = self.encode(image)
+            except Exception as e:
+                logger.warning(f'Failed to encode error screenshot: {e}')
+                return True
+            if data is not None:
+                self.deque.append({'time': image_time, 'data': data})
+            return True
+
+    def _encode_loop(self):
+        while 1:
+            self._event.wait()
+            self._event.clear()
+            while self._encode_one():
+                pass
+
+    def items(self):
+        """
+        Returns:
+            list[dict]: Encoded frames, {'time': datetime, 'data': bytes}, oldest first.
+                Frames not yet encoded are encoded in current thread.
+        """
+        while self._encode_one():
+            pass
+        with self._encode_lock:
+            return list(self.deque)
+
+    def clear(self):
+        with self._encode_lock:
+            self._pending.clear()
+            self.deque.clear()
+
+
 class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy):
     _screen_size_checked = False
     _screen_black_checked = False
@@ -26,6 +189,42 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy):
     _screenshot_interval = Timer(0.1)
     _last_save_time = {}
     image: np.ndarray
+    # True if Emulator_ScreenshotMethod is `auto`, screenshot methods will be re-evaluated periodically
+    screenshot_auto_tune_enable = False
+    # Switch to another method only if it's faster than current one by this ratio
+    screenshot_auto_tune_hysteresis = 0.2
+    screenshot_auto_tune_probes = 3
+
+    # Screenshot prefetch, a background thread captures the next frame while caller is processing current one.
+    # Latest frame captured in background, (capture start time, image)
+    _prefetch_frame: tuple = None
+    # Capture start time of the last frame returned
+    _prefetch_last_start = 0.
+    _prefetch_thread: threading.Thread = None
+    _prefetch_alive = False
+    _prefetch_request = False
+    _prefetch_busy = False
+    _prefetch_error: Exception = None
+    # Wait at most N seconds for a prefetched frame, before falling back to capture directly
+    screenshot_prefetch_timeout = 10
+    # Frames whose capture started more than N seconds before `screenshot()` are outdated,
+    # such as the one captured at the start of an idle wait
+    screenshot_prefetch_max_age = 1
+    # Time of the last click or swipe finished, frames captured before that are outdated
+    # Will be updated in Control
+    last_control_time = 0.
+
+    @cached_property
+    def _prefetch_condition(self) -> threading.Condition:
+        return threading.Condition()
+
+    @cached_property
+    def screenshot_telemetry(self) -> ScreenshotTelemetry:
+        return ScreenshotTelemetry()
+
+    @cached_property
+    def screenshot_auto_tune_timer(self) -> Timer:
+        return Timer(600).start()
 
     @cached_property
     def screenshot_methods(self):
@@ -40,20 +239,48 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy):
             'scrcpy': self.screenshot_scrcpy,
         }
 
+    @trace(cat='device')
+    def _screenshot_capture(self):
+        """
+        Take a screenshot with the configured method and record telemetry.
+
+        Returns:
+            np.ndarray:
+        """
+        name = self.config.Emulator_ScreenshotMethod
+        method = self.screenshot_methods.get(name, self.screenshot_adb)
+        start = time.time()
+        try:
+            image = method()
+        except Exception:
+            self.screenshot_telemetry.record_failure(name)
+            raise
+        self.screenshot_telemetry.record(name, time.time() - start)
+        return image
+
     def screenshot(self):
         """
         Returns:
             np.ndarray:
         """
-        self._screenshot_interval.wait()
-        self._screenshot_interval.reset()
+        prefetch = self.screenshot_prefetch_available()
+        if not prefetch:
+            self.screenshot_prefetch_stop()
+            with TRACER.span('Screenshot.interval_wait', cat='sleep'):
+                self._screenshot_interval.wait()
+            self._screenshot_interval.reset()
 
         for _ in range(2):
-            method = self.screenshot_methods.get(
-                self.config.Emulator_ScreenshotMethod,
-                self.screenshot_adb
-            )
-            self.image = method()
+            image = None
+            if prefetch:
+                image = self.screenshot_prefetch_get()
+                if image is None:
+                    # Prefetch failed, capture in current thread to raise errors or retry
+                    prefetch = False
+                    self.screenshot_prefetch_stop()
+            if image is None:
+                image = self._screenshot_capture()
+            self.image = image
 
             # if self.config.Emulator_ScreenshotDedithering:
             #     # This will take 40-60ms
@@ -61,7 +288,7 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy):
             self.image = self._handle_orientated_image(self.image)
 
             if self.config.Error_SaveError:
-                self.screenshot_deque.append({'time': datetime.now(), 'image': self.image})
+                self.screenshot_deque.append(datetime.now(), self.image)
 
             if self.check_screen_size() and self.check_screen_black():
                 break
@@ -70,6 +297,225 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy):
 
         return self.image
 
+    def screenshot_prefetch_available(self):
+        """
+        Returns:
+            bool: If screenshot prefetch enabled and meaningful for current method
+        """
+        if not self.config.Optimization_ScreenshotPrefetch:
+            return False
+        # Scrcpy receives video stream continuously, already "prefetched"
+        if self.config.Emulator_ScreenshotMethod == 'scrcpy':
+            return False
+        return True
+
+    def screenshot_prefetch_get(self):
+        """
+        Get a frame captured in background, whose capture started after
+        the last frame returned and the last control action,
+        and not earlier than `screenshot_prefetch_max_age` before this call.
+        Capture of the next frame starts as soon as this frame is taken.
+
+        Returns:
+            np.ndarray: Or None if prefetch failed
+        """
+        if self._prefetch_thread is None or not self._prefetch_thread.is_alive():
+            self.screenshot_prefetch_start()
+
+        cond = self._prefetch_condition
+        now = time.time()
+        deadline = now + self.screenshot_prefetch_timeout
+        oldest = now - self.screenshot_prefetch_max_age
+        with cond:
+            while 1:
+                if self._prefetch_error is not None:
+                    logger.warning(f'Screenshot prefetch failed: {self._prefetch_error}')
+                    self._prefetch_error = None
+                    return None
+                need = max(self.last_control_time, self._prefetch_last_start, oldest)
+                frame = self._prefetch_frame
+                if frame is not None and frame[0] > need:
+                    self._prefetch_frame = None
+                    self._prefetch_last_start = frame[0]
+                    # Start capturing the next frame
+                    self._prefetch_request = True
+                    cond.notify_all()
+                    return frame[1]
+                # No frame, or frame outdated by a click or by time
+                if not self._prefetch_busy and not self._prefetch_request:
+                    self._prefetch_request = True
+                    cond.notify_all()
+                remain = deadline - time.time()
+                if remain <= 0:
+                    logger.warning('Screenshot prefetch timeout')
+                    return None
+                cond.wait(timeout=remain)
+
+    def _screenshot_prefetch_loop(self):
+        cond = self._prefetch_condition
+        while 1:
+            with cond:
+                while self._prefetch_alive and not self._prefetch_request:
+                    cond.wait()
+                if not self._prefetch_alive:
+                    return
+                self._prefetch_request = False
+                self._prefetch_busy = True
+
+            self._screenshot_interval.wait()
+            self._screenshot_interval.reset()
+            start = time.time()
+            try:
+                image = self._screenshot_capture()
+            except Exception as e:
+                with cond:
+                    self._prefetch_error = e
+                    self._prefetch_busy = False
+                    self._prefetch_alive = False
+                    cond.notify_all()
+                return
+
+            with cond:
+                self._prefetch_frame = (start, image)
+                self._prefetch_busy = False
+                cond.notify_all()
+
+    def screenshot_prefetch_start(self):
+        self.screenshot_prefetch_stop()
+        logger.info('Screenshot prefetch start')
+        with self._prefetch_condition:
+            self._prefetch_alive = True
+            self._prefetch_request = True
+            self._prefetch_busy = False
+            self._prefetch_frame = None
+            self._prefetch_error = None
+        self._prefetch_thread = threading.Thread(
+            target=self._screenshot_prefetch_loop, name='ScreenshotPrefetch', daemon=True)
+        self._prefetch_thread.start()
+
+    def screenshot_prefetch_stop(self):
+        """
+        Stop prefetch thread and wait for the capture in progress,
+        so screenshot methods won't be called from two threads.
+        """
+        thread = self._prefetch_thread
+        if thread is None:
+            return
+        with self._prefetch_condition:
+            self._prefetch_alive = False
+            self._prefetch_frame = None
+            self._prefetch_condition.notify_all()
+        thread.join(timeout=self.screenshot_prefetch_timeout)
+        if thread.is_alive():
+            logger.warning('Screenshot prefetch thread does not stop in time')
+        self._prefetch_thread = None
+
+    def screenshot_auto_tune_candidates(self):
+        """
+        Returns:
+            list[str]: Screenshot methods available on current device
+        """
+        candidates = ['ADB_nc', 'DroidCast_raw', 'scrcpy', 'aScreenCap_nc']
+        if not (21 <= self.sdk_ver <= 28):
+            candidates.remove('aScreenCap_nc')
+        if self.is_chinac_phone_cloud:
+            candidates = [m for m in candidates if m not in ['ADB_nc', 'aScreenCap_nc']]
+        return candidates
+
+    def screenshot_probe(self, name):
+        """
+        Take a few screenshots with the given method and record costs into telemetry.
+        Screenshots are dropped, `self.image` is unchanged.
+        """
+        method = self.screenshot_methods[name]
+        for _ in range(self.screenshot_auto_tune_probes):
+            start = time.time()
+            try:
+                method()
+            except Exception as e:
+                # Including RequestHumanTakeover from retry wrappers
+                logger.warning(f'Screenshot probe failed on {name}: {e}')
+                self.screenshot_telemetry.record_failure(name)
+                break
+            self.screenshot_telemetry.record(name, time.time() - start)
+        if name == 'scrcpy' and self.config.Emulator_ScreenshotMethod != 'scrcpy' \
+                and self.config.Emulator_ControlMethod != 'scrcpy':
+            self._scrcpy_server_stop()
+
+    def screenshot_auto_tune_run(self):
+        """
+        Re-evaluate screenshot methods if it's time to, and switch to the faster one.
+        Switched in current run only, user config keeps `auto`.
+
+        Call it on the automation thread between tasks,
+        probes go through retry wrappers of other methods,
+        which may reconnect ADB, install DroidCast or start scrcpy.
+        """
+        if not self.screenshot_auto_tune_enable:
+            return
+        if not self.screenshot_auto_tune_timer.reached():
+            return
+        self.screenshot_auto_tune_timer.reset()
+
+        # Prefetch thread is using current method
+        self.screenshot_prefetch_stop()
+        try:
+            best = self.screenshot_auto_tune()
+        except Exception as e:
+            logger.warning(f'Screenshot auto tune failed: {e}')
+            return
+        current = self.config.Emulator_ScreenshotMethod
+        if best is None or best == current:
+            return
+
+        logger.info(f'Screenshot method switched: {current} -> {best}')
+        if current == 'scrcpy' and self.config.Emulator_ControlMethod != 'scrcpy':
+            self._scrcpy_server_stop()
+        self.config.override(Emulator_ScreenshotMethod=best)
+        if 'scrcpy' in [current, best]:
+            self.screenshot_interval_set()
+
+    def screenshot_auto_tune(self):
+        """
+        Re-evaluate screenshot methods with recent latency.
+        Current method is evaluated by the screenshots taken, other methods are probed here.
+        Runs between tasks, see `screenshot_auto_tune_run()`.
+
+        Returns:
+            str: Screenshot method to switch to, or None to keep current one
+        """
+        logger.info('Screenshot auto tune')
+        telemetry = self.screenshot_telemetry
+        current = self.config.Emulator_ScreenshotMethod
+        for name in self.screenshot_auto_tune_candidates():
+            if name == current:
+                continue
+            # Methods keep failing are skipped
+            if telemetry.total[name] >= self.screenshot_auto_tune_probes and telemetry.failure_rate(name) >= 0.5:
+                continue
+            self.screenshot_probe(name)
+        telemetry.show()
+
+        healthy = [
+            name for name in telemetry.latency.keys()
+            if name in self.screenshot_methods and telemetry.median(name) is not None and telemetry.is_healthy(name)
+        ]
+        if not healthy:
+            logger.info(f'No healthy screenshot method, keep {current}')
+            return None
+        best = min(healthy, key=telemetry.median)
+        if best == current:
+            logger.info(f'Keep screenshot method {current}')
+            return None
+
+        current_cost = telemetry.median(current)
+        if telemetry.is_healthy(current) and current_cost is not None \
+                and telemetry.median(best) > current_cost * (1 - self.screenshot_auto_tune_hysteresis):
+            logger.info(f'Keep screenshot method {current}, {best} is not fast enough')
+            return None
+
+        return best
+
     def _handle_orientated_image(self, image):
         """
         Args:
@@ -97,8 +543,8 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy):
         return image
 
     @cached_property
-    def screenshot_deque(self):
-        return deque(maxlen=int(self.config.Error_ScreenshotLength))
+    def screenshot_deque(self) -> ScreenshotDeque:
+        return ScreenshotDeque(maxlen=int(self.config.Error_ScreenshotLength))
 
     def save_screenshot(self, genre='items', interval=None, to_base_folder=False):
         """Save a screenshot. Use millisecond timestamp as file name.
@@ -169,6 +615,55 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy):
             logger.info(f'Screenshot interval set to {interval}s')
             self._screenshot_interval.limit = interval
 
+    # Screenshots are downscaled by 1/8 into signatures, 1280x720 -> 160x90
+    signature_scale = 8
+    _image_signature: np.ndarray = None
+    _image_signature_source: np.ndarray = None
+
+    @property
+    def image_signature(self) -> np.ndarray:
+        """
+        A cheap perceptual signature of current image, grayscale and downscaled by `signature_scale`.
+        Calculated on demand and once per image.
+
+        Returns:
+            np.ndarray: Shape (height // signature_scale, width // signature_scale)
+        """
+        image = self.image
+        if self._image_signature_source is not image:
+            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+            scale = 1 / self.signature_scale
+            self._image_signature = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            self._image_signature_source = image
+        return self._image_signature
+
+    def signature_crop(self, area=None) -> np.ndarray:
+        """
+        Args:
+            area (tuple): Area on screenshot, None for full screen
+
+        Returns:
+            np.ndarray: Signature of the area, in int16 so it can be subtracted directly
+        """
+        signature = self.image_signature
+        if area is not None:
+            x1, y1, x2, y2 = area
+            scale = self.signature_scale
+            area = (x1 // scale, y1 // scale, max(-(-x2 // scale), x1 // scale + 1), max(-(-y2 // scale), y1 // scale + 1))
+            signature = crop(signature, area, copy=False)
+        return signature.astype(np.int16)
+
+    def image_digest(self, area) -> bytes:
+        """
+        Args:
+            area (tuple): Area on screenshot
+
+        Returns:
+            bytes: Hash of the pixels in area, same digest means pixel-identical
+        """
+        image = np.ascontiguousarray(crop(self.image, area, copy=False))
+        return hashlib.blake2b(image.data, digest_size=16).digest()
+
     def image_show(self, image=None):
         if image is None:
             image = self.image
@@ -1,3 +1,4 @@
 from .logger import logger
-from .logger import set_file_logger, set_func_logger
+from .logger import set_file_logger, set_func_logger, set_pipe_logger
+from .logger import LogRecordRenderer
 from .logger import WEB_THEME, Highlighter, HTMLConsole
@@ -2,6 +2,8 @@ import datetime
 import logging
 import os
 import sys
+import threading
+from collections import deque
 from typing import Callable, List
 
 from rich.console import Console, ConsoleOptions, ConsoleRenderable, NewLine
@@ -183,6 +185,7 @@ def _set_file_logger(name=pyw_name):
         h, (logging.FileHandler, RichFileHandler))]
     logger.addHandler(file)
     logger.log_file = log_file
+    logger.hr_offset = log_offset()
 
 
 def set_file_logger(name=pyw_name):
@@ -218,9 +221,30 @@ def set_file_logger(name=pyw_name):
         h, (logging.FileHandler, RichFileHandler))]
     logger.addHandler(hdlr)
     logger.log_file = log_file
+    logger.hr_offset = log_offset()
 
 
-def set_func_logger(func):
+def log_offset():
+    """
+    Returns:
+        int: Bytes written to `logger.log_file`, or None if not logging to file
+    """
+    for hdlr in logger.handlers:
+        if isinstance(hdlr, RichFileHandler):
+            file = hdlr.console.file
+        elif isinstance(hdlr, logging.FileHandler):
+            file = hdlr.stream
+        else:
+            continue
+        try:
+            file.flush()
+            return file.tell()
+        except (OSError, ValueError):
+            return None
+    return None
+
+
+def _web_handler(func=None) -> RichRenderableHandler:
     console = HTMLConsole(
         force_terminal=False,
         force_interactive=False,
@@ -243,11 +267,162 @@ def set_func_logger(func):
         highlighter=Highlighter(),
     )
     hdlr.setFormatter(web_formatter)
+    return hdlr
+
+
+def set_func_logger(func):
+    hdlr = _web_handler(func=func)
     logger.handlers = [h for h in logger.handlers if not isinstance(
-        h, RichRenderableHandler)]
+        h, (RichRenderableHandler, PipeLogHandler))]
     logger.addHandler(hdlr)
 
 
+class PipeLogHandler(logging.Handler):
+    """
+    Send compact log records to another process through a pipe, use `LogRecordRenderer` to receive.
+
+    Records are appended to a ring buffer and sent in batches by a background thread,
+    so logging never waits for the receiver. If the receiver can't keep up,
+    the oldest records are dropped.
+    """
+
+    def __init__(self, conn, maxlen=2000):
+        """
+        Args:
+            conn (multiprocessing.connection.Connection): Sending end of a pipe
+            maxlen (int): Max records buffered
+        """
+        super().__init__()
+        self.conn = conn
+        self.buffer = deque(maxlen=maxlen)
+        self.dropped = 0
+        self._event = threading.Event()
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._send_loop, name='PipeLogHandler', daemon=True)
+        self._thread.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            message = record.getMessage()
+        except Exception:
+            self.handleError(record)
+            return
+        traceback = None
+        if record.exc_info and record.exc_info != (None, None, None):
+            exc_type, exc_value, exc_traceback = record.exc_info
+            traceback = Traceback.from_exception(
+                exc_type,
+                exc_value,
+                exc_traceback,
+                extra_lines=2,
+                show_locals=True,
+            )
+        self.put(('log', record.levelno, record.levelname, record.created, message,
+                  getattr(record, 'markup', None), traceback))
+
+    def put(self, item) -> None:
+        """
+        Args:
+            item (tuple): ('log', levelno, levelname, created, message, markup, traceback)
+                or ('renderable', ConsoleRenderable)
+        """
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(item)
+        self._event.set()
+
+    def _send(self) -> bool:
+        """
+        Returns:
+            bool: If pipe still available
+        """
+        with self._send_lock:
+            if self._closed:
+                return False
+            batch = []
+            while 1:
+                try:
+                    batch.append(self.buffer.popleft())
+                except IndexError:
+                    break
+            if self.dropped:
+                batch.insert(0, ('log', logging.WARNING, 'WARNING', datetime.datetime.now().timestamp(),
+                                 f'{self.dropped} logs dropped', None, None))
+                self.dropped = 0
+            if not batch:
+                return True
+            try:
+                self.conn.send(batch)
+                return True
+            except (OSError, ValueError):
+                self._closed = True
+                return False
+
+    def _send_loop(self) -> None:
+        while 1:
+            self._event.wait()
+            self._event.clear()
+            if not self._send():
+                return
+
+    def flush(self) -> None:
+        self._send()
+
+    def close(self) -> None:
+        self.flush()
+        super().close()
+
+
+def set_pipe_logger(conn) -> PipeLogHandler:
+    """
+    Args:
+        conn (multiprocessing.connection.Connection): Sending end of a pipe
+
+    Returns:
+        PipeLogHandler:
+    """
+    hdlr = PipeLogHandler(conn)
+    logger.handlers = [h for h in logger.handlers if not isinstance(
+        h, (RichRenderableHandler, PipeLogHandler))]
+    logger.addHandler(hdlr)
+    return hdlr
+
+
+class LogRecordRenderer:
+    """
+    Convert records sent by `PipeLogHandler` into renderables, same as `set_func_logger()` produces.
+    """
+
+    def __init__(self):
+        self.hdlr = _web_handler()
+
+    def render(self, item) -> ConsoleRenderable:
+        """
+        Args:
+            item (tuple): Record from `PipeLogHandler.put()`
+
+        Returns:
+            ConsoleRenderable:
+        """
+        if item[0] == 'renderable':
+            return item[1]
+        _, levelno, levelname, created, message, markup, traceback = item
+        record = logging.makeLogRecord({
+            'name': logger.name,
+            'levelno': levelno,
+            'levelname': levelname,
+            'created': created,
+            'msecs': (created - int(created)) * 1000,
+            'msg': message,
+            'args': None,
+        })
+        if markup is not None:
+            record.markup = markup
+        message_renderable = self.hdlr.render_message(record, self.hdlr.format(record))
+        return self.hdlr.render(record=record, traceback=traceback, message_renderable=message_renderable)
+
+
 def _get_renderables(
     self: Console, *objects, sep=" ", end="\n", justify=None, emoji=None, markup=None, highlight=None,
 ) -> List[ConsoleRenderable]:
@@ -278,6 +453,9 @@ def print(*objects: ConsoleRenderable, **kwargs):
         if isinstance(hdlr, RichRenderableHandler):
             for renderable in _get_renderables(hdlr.console, *objects, **kwargs):
                 hdlr._func(renderable)
+        elif isinstance(hdlr, PipeLogHandler):
+            for renderable in objects:
+                hdlr.put(('renderable', renderable))
         elif isinstance(hdlr, RichHandler):
             hdlr.console.print(*objects)
 
@@ -299,6 +477,8 @@ def hr(title, level=3):
     if level == 3:
         logger.info(f"[bold]<<< {title} >>>[/bold]", extra={"markup": True})
     if level == 0:
+        # Error logs start from here, see AzurLaneAutoScript.save_error_log()
+        logger.hr_offset = log_offset()
         logger.rule(characters='═')
         logger.rule(title, characters=' ')
         logger.rule(characters='═')
@@ -349,9 +529,13 @@ logger.attr = attr
 logger.attr_align = attr_align
 logger.set_file_logger = set_file_logger
 logger.set_func_logger = set_func_logger
+logger.set_pipe_logger = set_pipe_logger
 logger.rule = rule
 logger.print = print
+logger.log_offset = log_offset
 logger.log_file: str
+# Byte offset in log file where the last level 0 hr starts
+logger.hr_offset: int = None
 
 logger.set_file_logger()
 logger.hr('Start', level=0)
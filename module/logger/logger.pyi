@@ -68,5 +68,9 @@ class __logger(logging.Logger):
         *objects: ConsoleRenderable,
         **kwargs,
     ) -> None: ...
+    def log_offset(self) -> int | None: ...
+
+    log_file: str
+    hr_offset: int | None
 
 logger: __logger
@@ -1,4 +1,5 @@
 import re
+import difflib
 from dataclasses import dataclass
 from functools import cached_property
 from typing import ClassVar
@@ -112,23 +113,73 @@ class Keyword:
     """
     # Key: instance ID. Value: instance object.
     instances: ClassVar = {}
+    # Lookup index shared by all keyword classes, built on demand and dropped when new instances are added.
+    # Key: keyword class. Value: {(server, in_current_server, ignore_punctuation): {keyword: instance}}
+    _find_index: ClassVar = {}
 
     def __post_init__(self):
         self.__class__.instances[self.id] = self
+        Keyword._find_index.pop(self.__class__, None)
 
     @classmethod
-    def find(cls, name, in_current_server=False, ignore_punctuation=True):
+    def _get_index(cls, in_current_server=False, ignore_punctuation=True):
+        """
+        Args:
+            in_current_server:
+            ignore_punctuation:
+
+        Returns:
+            dict: Key: variable name or keyword. Value: Keyword instance.
+                The first instance wins on duplicated keywords, same as a linear search.
+        """
+        key = (server.server if in_current_server else '', in_current_server, ignore_punctuation)
+        indexes = Keyword._find_index.setdefault(cls, {})
+        try:
+            return indexes[key]
+        except KeyError:
+            pass
+
+        index = {}
+        for instance in cls.instances.values():
+            for keyword in instance._keywords_to_find(
+                    in_current_server=in_current_server, ignore_punctuation=ignore_punctuation):
+                index.setdefault(keyword, instance)
+        indexes[key] = index
+        return index
+
+    @classmethod
+    def _get_name_index(cls):
         """
+        Returns:
+            dict: Key: variable name. Value: Keyword instance.
+        """
+        indexes = Keyword._find_index.setdefault(cls, {})
+        try:
+            return indexes['name']
+        except KeyError:
+            pass
+
+        index = {}
+        for instance in cls.instances.values():
+            index.setdefault(instance.name, instance)
+        indexes['name'] = index
+        return index
+
+    @classmethod
+    def find_or_none(cls, name, in_current_server=False, ignore_punctuation=True, fuzzy=0.):
+        """
+        Same as `find()` but returns None instead of raising.
+
         Args:
             name: Name in any server or instance id.
             in_current_server: True to search the names from current server only.
             ignore_punctuation: True to remove punctuations and turn into lowercase before searching.
+            fuzzy: 0 to match exactly.
+                A float in (0, 1] to accept the closest keyword whose similarity is >= `fuzzy`,
+                if nothing matched exactly. 0.8 would tolerate one wrong character in 5.
 
         Returns:
-            Keyword instance.
-
-        Raises:
-            ScriptError: If nothing found.
+            Keyword instance, or None if nothing found.
         """
         # Already a keyword
         if isinstance(name, Keyword):
@@ -141,20 +192,44 @@ class Keyword:
                 pass
         # Probably a variable name
         if isinstance(name, str) and '_' in name:
-            for instance in cls.instances.values():
-                if name == instance.name:
-                    return instance
+            instance = cls._get_name_index().get(name)
+            if instance is not None:
+                return instance
         # Probably an in-game name
         if ignore_punctuation:
             name = parse_name(name)
         else:
             name = str(name)
-        instance: Keyword
-        for instance in cls.instances.values():
-            for keyword in instance._keywords_to_find(
-                    in_current_server=in_current_server, ignore_punctuation=ignore_punctuation):
-                if name == keyword:
-                    return instance
+        index = cls._get_index(in_current_server=in_current_server, ignore_punctuation=ignore_punctuation)
+        instance = index.get(name)
+        if instance is not None:
+            return instance
+
+        # Near-miss OCR results
+        if fuzzy and name:
+            matches = difflib.get_close_matches(name, index.keys(), n=1, cutoff=fuzzy)
+            if matches:
+                return index[matches[0]]
+
+        return None
+
+    @classmethod
+    def find(cls, name, in_current_server=False, ignore_punctuation=True):
+        """
+        Args:
+            name: Name in any server or instance id.
+            in_current_server: True to search the names from current server only.
+            ignore_punctuation: True to remove punctuations and turn into lowercase before searching.
+
+        Returns:
+            Keyword instance.
+
+        Raises:
+            ScriptError: If nothing found.
+        """
+        instance = cls.find_or_none(name, in_current_server=in_current_server, ignore_punctuation=ignore_punctuation)
+        if instance is not None:
+            return instance
 
         # Not found
         raise ScriptError(f'Cannot find a {cls.__name__} instance that matches "{name}"')
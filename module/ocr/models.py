@@ -1,11 +1,54 @@
 from module.base.decorator import cached_property
-from module.ocr.ppocr import TextSystem
+from module.logger import logger
 
 
 class OcrModel:
+    def __init__(self, use_server=True):
+        """
+        Args:
+            use_server: True to run OCR in the OCR server if `UseOcrServer` is enabled in deploy settings
+        """
+        self.use_server = use_server
+
+    @cached_property
+    def server_address(self):
+        """
+        Returns:
+            str: Address of OCR server, or None if not using OCR server
+        """
+        if not self.use_server:
+            return None
+        try:
+            from module.webui.setting import State
+            if State.deploy_config.UseOcrServer:
+                return State.deploy_config.OcrClientAddress
+        except Exception as e:
+            logger.warning(f'Failed to read ocr server settings: {e}')
+        return None
+
+    def load_proxy(self, lang):
+        """
+        Returns:
+            ModelProxy: Or None if OCR server not available
+        """
+        if not self.server_address:
+            return None
+        from module.ocr.rpc import ModelProxy
+        proxy = ModelProxy(lang, self.server_address)
+        if proxy.connect():
+            logger.info(f'Ocr model {lang} runs in ocr server {self.server_address}')
+            return proxy
+        return None
+
     @cached_property
     def ch(self):
+        proxy = self.load_proxy('ch')
+        if proxy is not None:
+            return proxy
+        # Imported here, onnxruntime is slow to import and not needed if OCR server is used
+        from module.ocr.ppocr import TextSystem
         return TextSystem()
 
 
 OCR_MODEL = OcrModel()
+
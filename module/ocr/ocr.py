@@ -1,20 +1,29 @@
+import copy
+import hashlib
 import re
+import threading
 import time
+import typing as t
+from collections import OrderedDict
 from datetime import timedelta
 
 import cv2
-from ppocronnx.predict_system import BoxedResult
 
 import module.config.server as server
 from module.base.button import ButtonWrapper
 from module.base.decorator import cached_property
+from module.base.trace import trace
 from module.base.utils import area_pad, corner2area, crop, float2str
-from module.exception import ScriptError
 from module.logger import logger
 from module.ocr.models import OCR_MODEL
-from module.ocr.ppocr import TextSystem
 from module.ocr.utils import merge_buttons
 
+if t.TYPE_CHECKING:
+    # ppocronnx imports onnxruntime, models are loaded on first OCR call
+    from ppocronnx.predict_system import BoxedResult
+
+    from module.ocr.ppocr import TextSystem
+
 
 def enlarge_canvas(image):
     """
@@ -31,7 +40,7 @@ def enlarge_canvas(image):
 
 
 class OcrResultButton:
-    def __init__(self, boxed_result: BoxedResult, keyword_classes: list):
+    def __init__(self, boxed_result: 'BoxedResult', keyword_classes: list):
         """
         Args:
             boxed_result: BoxedResult from ppocr-onnx
@@ -42,11 +51,10 @@ class OcrResultButton:
         # self.color =
         self.button = boxed_result.box
 
-        try:
-            self.matched_keyword = self.match_keyword(boxed_result.ocr_text, keyword_classes)
+        self.matched_keyword = self.match_keyword(boxed_result.ocr_text, keyword_classes)
+        if self.matched_keyword is not None:
             self.name = str(self.matched_keyword)
-        except ScriptError:
-            self.matched_keyword = None
+        else:
             self.name = boxed_result.ocr_text
 
         self.text = boxed_result.ocr_text
@@ -60,19 +68,14 @@ class OcrResultButton:
             keyword_classes: List of Keyword classes
 
         Returns:
-            Keyword:
-
-        Raises:
-            ScriptError: If no keywords matched
+            Keyword: Or None if no keywords matched
         """
         for keyword_class in keyword_classes:
-            try:
-                matched = keyword_class.find(ocr_text, in_current_server=True, ignore_punctuation=True)
+            matched = keyword_class.find_or_none(ocr_text, in_current_server=True, ignore_punctuation=True)
+            if matched is not None:
                 return matched
-            except ScriptError:
-                continue
 
-        raise ScriptError
+        return None
 
     def __str__(self):
         return self.name
@@ -89,6 +92,77 @@ class OcrResultButton:
         return True
 
 
+class OcrCache:
+    """
+    A bounded LRU cache of raw OCR model outputs, shared by all `Ocr` instances.
+    Key is (method, lang, hash of the preprocessed image), so static UI regions polled in loops,
+    like counters and list rows, don't run the model again.
+    """
+    size = 256
+    # Log hit rate every N lookups
+    log_interval = 100
+
+    def __init__(self):
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hit = 0
+        self.miss = 0
+
+    @staticmethod
+    def image_key(method, lang, image) -> tuple:
+        """
+        Args:
+            method (str): 'rec' or 'det'
+            lang (str):
+            image (np.ndarray):
+
+        Returns:
+            tuple:
+        """
+        if not image.flags['C_CONTIGUOUS']:
+            image = image.copy()
+        digest = hashlib.blake2b(image.data, digest_size=16).digest()
+        return method, lang, image.shape, image.dtype.str, digest
+
+    def get(self, key):
+        """
+        Returns:
+            Cached result, or None if not cached
+        """
+        with self._lock:
+            try:
+                value = self._cache[key]
+                self._cache.move_to_end(key)
+                self.hit += 1
+            except KeyError:
+                value = None
+                self.miss += 1
+            total = self.hit + self.miss
+        if total % self.log_interval == 0:
+            self.log_stats()
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.size:
+                self._cache.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def log_stats(self):
+        total = self.hit + self.miss
+        rate = self.hit / total if total else 0.
+        logger.info(f'OcrCache: hit={self.hit}, miss={self.miss}, hit_rate={float2str(rate)}, '
+                    f'size={len(self._cache)}')
+
+
+OCR_CACHE = OcrCache()
+
+
 class Ocr:
     # Merge results with box distance <= thres
     merge_thres_x = 0
@@ -114,7 +188,7 @@ class Ocr:
         return self._lang if self._lang is not None else Ocr.server2lang()
 
     @cached_property
-    def model(self) -> TextSystem:
+    def model(self) -> 'TextSystem':
         return OCR_MODEL.__getattribute__(self.lang)
 
     def pre_process(self, image):
@@ -145,13 +219,34 @@ class Ocr:
         """
         return result
 
+    def recognize(self, image_list) -> list[tuple[str, float]]:
+        """
+        Run text recognition with cache, only images not in cache are sent to the model.
+
+        Args:
+            image_list (list[np.ndarray]): Preprocessed text lines
+
+        Returns:
+            list[tuple[str, float]]: Text and score of each line
+        """
+        keys = [OcrCache.image_key('rec', self.lang, image) for image in image_list]
+        result_list = [OCR_CACHE.get(key) for key in keys]
+        missing = [index for index, result in enumerate(result_list) if result is None]
+        if missing:
+            recognized = self.model.ocr_lines([image_list[index] for index in missing])
+            for index, (result, score) in zip(missing, recognized):
+                result_list[index] = (result, score)
+                OCR_CACHE.set(keys[index], (result, score))
+        return result_list
+
+    @trace(cat='ocr', detail=0)
     def ocr_single_line(self, image):
         # pre process
         start_time = time.time()
         image = crop(image, self.button.area)
         image = self.pre_process(image)
         # ocr
-        result, _ = self.model.ocr_single_line(image)
+        result, _ = self.recognize([image])[0]
         # after proces
         result = self.after_process(result)
         result = self.format_result(result)
@@ -159,12 +254,13 @@ class Ocr:
                     text=str(result))
         return result
 
+    @trace(cat='ocr', detail=0)
     def ocr_multi_lines(self, image_list):
         # pre process
         start_time = time.time()
         image_list = [self.pre_process(image) for image in image_list]
         # ocr
-        result_list = self.model.ocr_lines(image_list)
+        result_list = self.recognize(image_list)
         result_list = [(result, score) for result, score in result_list]
         # after process
         result_list = [(self.after_process(result), score) for result, score in result_list]
@@ -173,7 +269,8 @@ class Ocr:
                     text=str([result for result, _ in result_list]))
         return result_list
 
-    def detect_and_ocr(self, image, direct_ocr=False) -> list[BoxedResult]:
+    @trace(cat='ocr', detail=0)
+    def detect_and_ocr(self, image, direct_ocr=False) -> 'list[BoxedResult]':
         """
         Args:
             image:
@@ -189,7 +286,13 @@ class Ocr:
         image = self.pre_process(image)
         # ocr
         image = enlarge_canvas(image)
-        results: list[BoxedResult] = self.model.detect_and_ocr(image)
+        key = OcrCache.image_key('det', self.lang, image)
+        results: list[BoxedResult] = OCR_CACHE.get(key)
+        if results is None:
+            results = self.model.detect_and_ocr(image)
+            OCR_CACHE.set(key, results)
+        # Results are modified below, don't touch the cached ones
+        results = [self._copy_boxed_result(result) for result in results]
         # after proces
         for result in results:
             if not direct_ocr:
@@ -203,6 +306,13 @@ class Ocr:
                     text=str([result.ocr_text for result in results]))
         return results
 
+    @staticmethod
+    def _copy_boxed_result(result: 'BoxedResult') -> 'BoxedResult':
+        result = copy.copy(result)
+        result.box = copy.copy(result.box)
+        return result
+
+    @trace(cat='ocr', detail=0)
     def matched_ocr(self, image, keyword_classes, direct_ocr=False) -> list[OcrResultButton]:
         """
         Args:
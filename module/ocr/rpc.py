@@ -0,0 +1,207 @@
+import multiprocessing
+import os
+import threading
+from multiprocessing.connection import Client, Connection, Listener
+
+from module.base.decorator import cached_property
+from module.logger import logger
+
+# Environment variable that holds the authkey of current launch
+OCR_SERVER_AUTHKEY_ENV = 'SRC_OCR_SERVER_AUTHKEY'
+# Methods of TextSystem that can be called through the OCR server
+OCR_SERVER_METHODS = ['ocr_lines', 'ocr_single_line', 'detect_and_ocr']
+OCR_SERVER_PROCESS: multiprocessing.Process = None
+
+
+class OcrServerError(Exception):
+    pass
+
+
+def ocr_server_authkey() -> bytes:
+    """
+    Random authkey generated once per launch.
+    The key is stored in environment variables of GUI process,
+    so OCR server and alas instances started by GUI inherit it,
+    while other processes can't connect to the server.
+
+    Returns:
+        bytes:
+    """
+    key = os.environ.get(OCR_SERVER_AUTHKEY_ENV)
+    if not key:
+        key = os.urandom(32).hex()
+        os.environ[OCR_SERVER_AUTHKEY_ENV] = key
+    return bytes.fromhex(key)
+
+
+def parse_address(address) -> tuple[str, int]:
+    """
+    Args:
+        address (str): Such as `127.0.0.1:22268`
+
+    Returns:
+        tuple[str, int]: Host and port
+    """
+    host, port = str(address).rsplit(':', maxsplit=1)
+    return host.strip('[]'), int(port)
+
+
+class OcrServer:
+    """
+    Hold one copy of OCR models and serve all alas instances,
+    so each instance doesn't load its own model weights.
+
+    Each client connection is served in a thread, onnxruntime sessions are thread-safe.
+    """
+
+    def __init__(self, port=22268, authkey=None):
+        self.port = port
+        if authkey is None:
+            authkey = ocr_server_authkey()
+        self.authkey = authkey
+
+    @cached_property
+    def model(self):
+        from module.ocr.models import OcrModel
+        return OcrModel(use_server=False)
+
+    def serve_forever(self):
+        # Load models before accepting, instances connected later won't wait for a cold start
+        for lang in ['ch']:
+            _ = self.model.__getattribute__(lang)
+
+        listener = Listener(('127.0.0.1', self.port), authkey=self.authkey)
+        logger.info(f'Ocr server listening on 127.0.0.1:{self.port}')
+        while 1:
+            try:
+                conn = listener.accept()
+            except multiprocessing.AuthenticationError as e:
+                logger.warning(f'Ocr server rejected a connection: {e}')
+                continue
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+    def handle(self, conn: Connection):
+        try:
+            while 1:
+                lang, method, args, kwargs = conn.recv()
+                try:
+                    if method not in OCR_SERVER_METHODS:
+                        raise OcrServerError(f'Unknown method: {method}')
+                    model = self.model.__getattribute__(lang)
+                    result = True, model.__getattribute__(method)(*args, **kwargs)
+                except Exception as e:
+                    logger.exception(e)
+                    result = False, f'{e.__class__.__name__}: {e}'
+                conn.send(result)
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+
+class ModelProxy:
+    """
+    A TextSystem-like object that runs OCR in the OCR server.
+    Fallback to local model if server is offline or disconnected.
+    """
+
+    def __init__(self, lang, address):
+        self.lang = lang
+        self.address = parse_address(address)
+        self.online = True
+        self.authkey = ocr_server_authkey()
+        # One connection per thread, so concurrent OCR jobs of an instance don't wait for each other
+        self._local = threading.local()
+
+    @cached_property
+    def local_model(self):
+        from module.ocr.models import OcrModel
+        return OcrModel(use_server=False).__getattribute__(self.lang)
+
+    def _connection(self) -> Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = Client(self.address, authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def connect(self) -> bool:
+        """
+        Returns:
+            bool: If server is online
+        """
+        try:
+            self._connection()
+            return True
+        except (OSError, multiprocessing.AuthenticationError) as e:
+            logger.warning(f'Ocr server offline: {e}')
+            self.online = False
+            return False
+
+    def _call(self, method, *args, **kwargs):
+        if self.online:
+            try:
+                conn = self._connection()
+                conn.send((self.lang, method, args, kwargs))
+                success, result = conn.recv()
+            except (EOFError, OSError, multiprocessing.AuthenticationError) as e:
+                logger.warning(f'Ocr server disconnected: {e}, use local model')
+                self._local.conn = None
+                self.online = False
+            else:
+                if success:
+                    return result
+                raise OcrServerError(result)
+
+        return self.local_model.__getattribute__(method)(*args, **kwargs)
+
+    def ocr_lines(self, img_list):
+        return self._call('ocr_lines', img_list)
+
+    def ocr_single_line(self, img):
+        return self._call('ocr_single_line', img)
+
+    def detect_and_ocr(self, img, *args, **kwargs):
+        return self._call('detect_and_ocr', img, *args, **kwargs)
+
+
+def start_ocr_server(port=22268, authkey=None):
+    """
+    Entry of the OCR server process.
+
+    Args:
+        port (int):
+        authkey (bytes): Authkey of current launch, from GUI process
+    """
+    from module.logger import set_file_logger
+    set_file_logger(name='ocr_server')
+
+    # Exit with GUI, even if GUI is killed
+    def watch_parent():
+        parent = multiprocessing.parent_process()
+        if parent is not None:
+            parent.join()
+            os._exit(0)
+
+    threading.Thread(target=watch_parent, daemon=True).start()
+    OcrServer(port, authkey=authkey).serve_forever()
+
+
+def start_ocr_server_process(port=22268):
+    global OCR_SERVER_PROCESS
+    if OCR_SERVER_PROCESS is not None and OCR_SERVER_PROCESS.is_alive():
+        return
+    logger.info(f'Start ocr server process, port={port}')
+    # Generate authkey before starting any child process, so all of them get the same key
+    authkey = ocr_server_authkey()
+    OCR_SERVER_PROCESS = multiprocessing.Process(
+        target=start_ocr_server, args=(int(port), authkey), name='OcrServer', daemon=True)
+    OCR_SERVER_PROCESS.start()
+
+
+def stop_ocr_server_process():
+    global OCR_SERVER_PROCESS
+    if OCR_SERVER_PROCESS is not None and OCR_SERVER_PROCESS.is_alive():
+        logger.info('Stop ocr server process')
+        OCR_SERVER_PROCESS.kill()
+    OCR_SERVER_PROCESS = None
@@ -1,8 +1,11 @@
-import itertools
+import typing as t
 
-from ppocronnx.predict_system import BoxedResult
+import numpy as np
 
-from module.base.utils import area_in_area, area_offset
+from module.base.utils import area_offset
+
+if t.TYPE_CHECKING:
+    from ppocronnx.predict_system import BoxedResult
 
 
 def area_cross_area(area1, area2, thres_x=20, thres_y=20):
@@ -29,14 +32,72 @@ def _merge_area(area1, area2):
     return min(xa1, xb1), min(ya1, yb1), max(xa2, xb2), max(ya2, yb2)
 
 
-def _merge_boxed_result(left: BoxedResult, right: BoxedResult) -> BoxedResult:
+def _merge_boxed_result(left: 'BoxedResult', right: 'BoxedResult') -> 'BoxedResult':
     left.box = _merge_area(left.box, right.box)
     left.ocr_text = left.ocr_text + right.ocr_text
     return left
 
 
-def merge_buttons(buttons: list[BoxedResult], thres_x=20, thres_y=20) -> list[BoxedResult]:
+def _boxes_array(areas) -> np.ndarray:
+    """
+    Args:
+        areas: List of (upper_left_x, upper_left_y, bottom_right_x, bottom_right_y)
+
+    Returns:
+        np.ndarray: Shape (n, 4)
+    """
+    return np.array(areas, dtype=np.int64).reshape(-1, 4)
+
+
+def _find(parent, x):
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def _union_crossed(boxes, thres_x=20, thres_y=20):
     """
+    Group boxes that cross each other, sort and sweep along x-axis.
+
+    Args:
+        boxes (np.ndarray): Shape (n, 4)
+        thres_x:
+        thres_y:
+
+    Returns:
+        list[int]: Root of each box, roots are the smallest index in group
+    """
+    n = len(boxes)
+    parent = list(range(n))
+    order = np.argsort(boxes[:, 0], kind='stable')
+    x1 = boxes[order, 0]
+    # Boxes after `i` in sorted order and start before `end[i]` are crossed on x-axis
+    end = np.searchsorted(x1, boxes[order, 2] + thres_x, side='right')
+    for i in range(n):
+        candidates = order[i + 1:end[i]]
+        if not len(candidates):
+            continue
+        index = order[i]
+        y1, y2 = boxes[index, 1], boxes[index, 3]
+        crossed = candidates[(boxes[candidates, 1] <= y2 + thres_y) & (y1 <= boxes[candidates, 3] + thres_y)]
+        root = _find(parent, index)
+        for other in crossed:
+            other = _find(parent, other)
+            if other == root:
+                continue
+            # Smaller index as root, so merged text follows the order of input
+            if other < root:
+                root, other = other, root
+            parent[other] = root
+    return [_find(parent, i) for i in range(n)]
+
+
+def merge_buttons(buttons: 'list[BoxedResult]', thres_x=20, thres_y=20) -> 'list[BoxedResult]':
+    """
+    Merge results that are close to each other.
+    Results in a group are merged into the first one, their texts are joined in the order of input.
+
     Args:
         buttons:
         thres_x: Merge results with horizontal box distance <= `thres_x`
@@ -45,18 +106,21 @@ def merge_buttons(buttons: list[BoxedResult], thres_x=20, thres_y=20) -> list[Bo
     Returns:
 
     """
-    dic_button = {button.box: button for button in buttons}
-    set_merged = set()
-    for left, right in itertools.combinations(dic_button.items(), 2):
-        left_box, left = left
-        right_box, right = right
-        if area_cross_area(left.box, right.box, thres_x=thres_x, thres_y=thres_y):
-            left = _merge_boxed_result(left, right)
-            dic_button[left_box] = left
-            dic_button[right_box] = left
-            set_merged.add(right_box)
-
-    return [button for box, button in dic_button.items() if box not in set_merged]
+    buttons = list(buttons)
+    while len(buttons) > 1:
+        roots = _union_crossed(_boxes_array([button.box for button in buttons]), thres_x=thres_x, thres_y=thres_y)
+        merged = []
+        for index, root in enumerate(roots):
+            if root == index:
+                merged.append(buttons[index])
+            else:
+                _merge_boxed_result(buttons[root], buttons[index])
+        if len(merged) == len(buttons):
+            break
+        # Merged boxes are larger, may cross other groups now
+        buttons = merged
+
+    return buttons
 
 
 # def pair_buttons(
@@ -78,11 +142,25 @@ def pair_buttons(group1, group2, relative_area):
     Yields:
         OcrResultButton, OcrResultButton:
     """
+    if not group1 or not group2:
+        return
+    boxes = _boxes_array([button.area for button in group2])
+    order = np.argsort(boxes[:, 0], kind='stable')
+    x1 = boxes[order, 0]
     for button1 in group1:
         area = area_offset(relative_area, offset=button1.area[:2])
-        for button2 in group2:
-            if area_in_area(button2.area, area, threshold=0):
-                yield button1, button2
+        # Buttons whose upper_left_x in area, then check the others
+        start = np.searchsorted(x1, area[0], side='left')
+        end = np.searchsorted(x1, area[2], side='right')
+        candidates = order[start:end]
+        if not len(candidates):
+            continue
+        inside = (area[1] <= boxes[candidates, 1]) \
+            & (boxes[candidates, 2] <= area[2]) \
+            & (boxes[candidates, 3] <= area[3])
+        # Yield in the order of group2
+        for index in np.sort(candidates[inside]):
+            yield button1, group2[index]
 
 
 def split_and_pair_buttons(buttons, split_func, relative_area):
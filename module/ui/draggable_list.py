@@ -1,14 +1,84 @@
+import contextlib
+import copy
 from typing import Optional
 
 import numpy as np
 
 from module.base.base import ModuleBase
-from module.base.button import ButtonWrapper
+from module.base.button import ButtonWrapper, ClickButton
 from module.base.timer import Timer
-from module.base.utils import area_size, random_rectangle_vector_opted
+from module.base.utils import area_offset, area_size, crop, random_rectangle_vector_opted, rgb2gray
 from module.logger import logger
 from module.ocr.keyword import Keyword
-from module.ocr.ocr import OcrResultButton
+from module.ocr.ocr import Ocr, OcrResultButton
+
+
+def estimate_list_offset(prev, cur, axis=0, bands=8, min_overlap=0.1, diff_threshold=30, diff_ratio=0.02):
+    """
+    Estimate how far list content moved between two frames.
+    Brightness profiles of a few bands along the list are matched at all offsets,
+    then the best offset is verified pixel by pixel on the overlapped part.
+
+    Args:
+        prev (np.ndarray): Grayscale list area of previous frame
+        cur (np.ndarray): Grayscale list area of current frame
+        axis (int): 0 for vertical lists, 1 for horizontal lists
+        bands (int): Number of bands to split the list into, across the list
+        min_overlap (float): Minimum overlap in ratio of list length
+        diff_threshold (int): Pixels with difference > `diff_threshold` are considered different
+        diff_ratio (float): Maximum ratio of different pixels on the overlapped part
+
+    Returns:
+        int: Offset in pixels along axis, content at `i` in prev is at `i + offset` in cur.
+            None if frames don't match, like list content changed or list is still moving.
+    """
+    if prev.shape != cur.shape:
+        return None
+    if axis == 1:
+        prev, cur = prev.T, cur.T
+    prev = prev.astype(np.float32)
+    cur = cur.astype(np.float32)
+    length, width = prev.shape
+    min_length = max(int(length * min_overlap), 1)
+    if length <= min_length:
+        return None
+
+    # Mean brightness of each band on each row, shape (bands, length)
+    bands = max(min(bands, width), 1)
+    edges = np.linspace(0, width, bands + 1).astype(int)
+    profile_prev = np.array([prev[:, s:e].mean(axis=1) for s, e in zip(edges[:-1], edges[1:])])
+    profile_cur = np.array([cur[:, s:e].mean(axis=1) for s, e in zip(edges[:-1], edges[1:])])
+
+    # Mean squared difference at each offset, on the overlapped part
+    # corr[k] = sum(cur[i + offset] * prev[i]), offset = k - (length - 1)
+    corr = sum(np.correlate(c, p, mode='full') for c, p in zip(profile_cur, profile_prev))
+    square_prev = np.concatenate([[0], np.cumsum((profile_prev ** 2).sum(axis=0))])
+    square_cur = np.concatenate([[0], np.cumsum((profile_cur ** 2).sum(axis=0))])
+    offsets = np.arange(-length + 1, length)
+    overlap = length - np.abs(offsets)
+    pos = np.maximum(offsets, 0)
+    neg = np.maximum(-offsets, 0)
+    sum_prev = square_prev[length - pos] - square_prev[neg]
+    sum_cur = square_cur[length - neg] - square_cur[pos]
+    msd = (sum_prev + sum_cur - 2 * corr) / overlap
+    msd[overlap < min_length] = np.inf
+    best = int(np.argmin(msd))
+    offset = int(offsets[best])
+
+    # Reject ambiguous results, like plain background matched at multiple offsets
+    others = msd.copy()
+    others[np.abs(offsets - offset) <= 2] = np.inf
+    if np.min(others) <= msd[best] * 4 + bands:
+        return None
+
+    # Verify
+    if offset >= 0:
+        diff = np.abs(cur[offset:] - prev[:length - offset])
+    else:
+        diff = np.abs(cur[:length + offset] - prev[-offset:])
+    if np.mean(diff > diff_threshold) > diff_ratio:
+        return None
+    return offset
 
 
 class DraggableList:
@@ -21,6 +91,14 @@ class DraggableList:
     - Cavern of Corrosion
     """
     drag_vector = (0.65, 0.85)
+    # Track rows between frames, if list moved or stayed, rows already known are moved with it,
+    # and only the newly exposed strip is OCR-ed.
+    incremental_ocr = True
+    # Rows closer than this to the newly exposed strip are OCR-ed again, they might be cut off in previous frame
+    strip_padding = 60
+    # Known rows are reused only if the list is nearly the same as previous frame.
+    # Maximum ratio of different pixels, an entry replaced by another one changes far more than this.
+    track_diff_ratio = 0.001
 
     def __init__(
             self,
@@ -55,6 +133,10 @@ class DraggableList:
         self.cur_min = 1
         self.cur_max = 1
         self.cur_buttons: list[OcrResultButton] = []
+        # Rows tracked for incremental OCR, (ocr_class, grayscale list image, rows)
+        self._track = None
+        # True in `track_rows()`
+        self._tracking = False
 
     def __str__(self):
         return f'DraggableList({self.name})'
@@ -83,12 +165,119 @@ class DraggableList:
         logger.warning(f'Current rows: {self.cur_buttons}')
         return None
 
+    @property
+    def drag_axis(self) -> int:
+        """
+        Returns:
+            int: 0 for vertical lists, 1 for horizontal lists
+        """
+        return 1 if self.drag_direction in ['left', 'right'] else 0
+
+    def track_reset(self):
+        """
+        Forget tracked rows, next `load_rows()` will OCR the whole list.
+        """
+        self._track = None
+
+    @contextlib.contextmanager
+    def track_rows(self):
+        """
+        Track rows between frames in this context, like when dragging and selecting in the same list.
+        Rows loaded outside are not trusted, `load_rows()` called outside always OCR the whole list.
+        """
+        tracking = self._tracking
+        if not tracking:
+            self.track_reset()
+        self._tracking = True
+        try:
+            yield
+        finally:
+            self._tracking = tracking
+
+    def ocr_rows(self, image) -> list[OcrResultButton]:
+        """
+        Args:
+            image: Screenshot
+
+        Returns:
+            Result of `matched_ocr()` on the whole list
+        """
+        ocr: Ocr = self.ocr_class(self.search_button)
+        if not self.incremental_ocr:
+            return ocr.matched_ocr(image, self.keyword_class)
+
+        area = ocr.button.area
+        gray = rgb2gray(crop(image, area))
+        offset = None
+        if self._track is not None:
+            ocr_class, prev, rows = self._track
+            if ocr_class == self.ocr_class:
+                offset = estimate_list_offset(prev, gray, axis=self.drag_axis, diff_ratio=self.track_diff_ratio)
+        if offset is None:
+            buttons = ocr.matched_ocr(image, self.keyword_class)
+            self._track = (self.ocr_class, gray, buttons)
+            return buttons
+
+        axis = self.drag_axis
+        # Index of list axis in areas, y for vertical lists, x for horizontal lists
+        i = 1 - axis
+        start, end = area[i], area[i + 2]
+        # Strip of list that wasn't visible in previous frame
+        if offset > 0:
+            strip = (start, min(start + offset + self.strip_padding, end))
+        elif offset < 0:
+            strip = (max(end + offset - self.strip_padding, start), end)
+        else:
+            strip = None
+
+        # Move known rows with the list, drop those moved out or close to the strip
+        delta = (offset, 0) if axis == 1 else (0, offset)
+        buttons = []
+        for row in rows:
+            row_area = area_offset(row.area, delta)
+            row_start, row_end = row_area[i], row_area[i + 2]
+            if row_start < start or row_end > end:
+                continue
+            if strip is not None and row_end > strip[0] and row_start < strip[1]:
+                continue
+            row = copy.copy(row)
+            row.area = row_area
+            row.button = area_offset(row.button, delta)
+            row.search = area_offset(row.search, delta)
+            buttons.append(row)
+
+        moved = len(buttons)
+        if strip is not None:
+            # Extend strip to the nearest row moved, so rows dropped above are OCR-ed again
+            if offset > 0:
+                strip = (start, min([row.area[i] for row in buttons] + [end]))
+            else:
+                strip = (max([row.area[i + 2] for row in buttons] + [start]), end)
+            strip_area = list(area)
+            strip_area[i], strip_area[i + 2] = strip
+            ocr.button = ClickButton(tuple(strip_area), name=ocr.name)
+            buttons += ocr.matched_ocr(image, self.keyword_class)
+            buttons.sort(key=lambda b: (b.area[i], b.area[1 - i]))
+        logger.attr(f'{self.name} tracked', f'offset {offset}, {moved} rows moved, strip {strip}')
+
+        self._track = (self.ocr_class, gray, buttons)
+        return buttons
+
     def load_rows(self, main: ModuleBase):
         """
         Parse current rows to get list position.
         """
-        self.cur_buttons = self.ocr_class(self.search_button) \
-            .matched_ocr(main.device.image, self.keyword_class)
+        if not self._tracking:
+            # List might be changed by UI actions since last load
+            self.track_reset()
+        self.apply_rows(self.ocr_rows(main.device.image))
+
+    def apply_rows(self, buttons: list[OcrResultButton]):
+        """
+        Args:
+            buttons: Result of `matched_ocr()`
+        """
+        self.cur_buttons = buttons
         # Get indexes
         indexes = [self.keyword2index(row.matched_keyword)
                    for row in self.cur_buttons]
@@ -158,28 +347,30 @@ class DraggableList:
             return False
 
         logger.info(f'Insight row: {row}, index={row_index}')
-        while 1:
-            if skip_first_screenshot:
-                skip_first_screenshot = False
-            else:
-                main.device.screenshot()
-
-            self.load_rows(main=main)
-
-            # End
-            if self.cur_min <= row_index <= self.cur_max:
-                break
-
-            # Drag pages
-            if row_index < self.cur_min:
-                self.drag_page(self.reverse_direction(self.drag_direction), main=main)
-            elif self.cur_max < row_index:
-                self.drag_page(self.drag_direction, main=main)
-
-            # Wait for bottoming out
-            main.wait_until_stable(self.search_button, timer=Timer(
-                0, count=0), timeout=Timer(1.5, count=5))
-            skip_first_screenshot = True
+        with self.track_rows():
+            while 1:
+                if skip_first_screenshot:
+                    skip_first_screenshot = False
+                else:
+                    main.device.screenshot()
+
+                self.load_rows(main=main)
+
+                # End
+                if self.cur_min <= row_index <= self.cur_max:
+                    break
+
+                # Drag pages
+                if row_index < self.cur_min:
+                    self.drag_page(self.reverse_direction(self.drag_direction), main=main)
+                elif self.cur_max < row_index:
+                    self.drag_page(self.drag_direction, main=main)
+
+                # Wait for list to start moving, then bottoming out
+                main.wait_until_change(self.search_button, timeout=Timer(0.5, count=2))
+                main.wait_until_stable(self.search_button, timer=Timer(
+                    0, count=0), timeout=Timer(1.5, count=5))
+                skip_first_screenshot = True
 
         return True
 
@@ -210,40 +401,43 @@ class DraggableList:
         Returns:
             If success
         """
-        if insight:
-            result = self.insight_row(
-                row, main=main, skip_first_screenshot=skip_first_screenshot)
-            if not result:
-                return False
-
-        logger.info(f'Select row: {row}')
-        skip_first_screenshot = True
-        interval = Timer(5)
-        skip_first_load_rows = True
-        load_rows_interval = Timer(1)
-        while 1:
-            if skip_first_screenshot:
-                skip_first_screenshot = False
-            else:
-                main.device.screenshot()
-
-            if skip_first_load_rows:
-                skip_first_load_rows = False
-            else:
-                if load_rows_interval.reached():
-                    self.load_rows(main=main)
-                    load_rows_interval.reset()
-
-            button = self.keyword2button(row)
-            if not button:
-                return False
-
-            # End
-            if self.is_row_selected(button, main=main):
-                logger.info('Row selected')
-                return True
-
-            # Click
-            if interval.reached():
-                main.device.click(button)
-                interval.reset()
+        with self.track_rows():
+            if insight:
+                result = self.insight_row(
+                    row, main=main, skip_first_screenshot=skip_first_screenshot)
+                if not result:
+                    return False
+
+            logger.info(f'Select row: {row}')
+            skip_first_screenshot = True
+            interval = Timer(5)
+            skip_first_load_rows = True
+            load_rows_interval = Timer(1)
+            while 1:
+                if skip_first_screenshot:
+                    skip_first_screenshot = False
+                else:
+                    main.device.screenshot()
+
+                # Rows must come from the frame to click on, list may move after clicking.
+                # Rows tracked are reused if list didn't move, so this is cheap.
+                if skip_first_load_rows:
+                    skip_first_load_rows = False
+                else:
+                    if load_rows_interval.reached():
+                        self.load_rows(main=main)
+                        load_rows_interval.reset()
+
+                button = self.keyword2button(row)
+                if not button:
+                    return False
+
+                # End
+                if self.is_row_selected(button, main=main):
+                    logger.info('Row selected')
+                    return True
+
+                # Click
+                if interval.reached():
+                    main.device.click(button)
+                    interval.reset()
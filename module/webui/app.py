@@ -46,6 +46,7 @@ from module.config.utils import (
     read_file,
 )
 from module.logger import logger
+from module.ocr.rpc import start_ocr_server_process, stop_ocr_server_process
 from module.webui.base import Frame
 from module.webui.fake import (
     get_config_mod,
@@ -390,7 +391,7 @@ class AlasGUI(Frame):
             ),
             put_scope("log", [put_html("")])
 
-        log.console.width = log.get_width()
+        log.width = log.get_width()
 
         switch_log_scroll = BinarySwitchButton(
             label_on=t("Gui.Button.ScrollON"),
@@ -587,7 +588,7 @@ class AlasGUI(Frame):
                 ],
             )
 
-        log.console.width = log.get_width()
+        log.width = log.get_width()
 
         with use_scope("scheduler-bar"):
             put_text(t("Gui.Overview.Scheduler")).style(
@@ -1199,8 +1200,8 @@ def startup():
     task_handler.start()
     # if State.deploy_config.DiscordRichPresence:
     #     init_discord_rpc()
-    # if State.deploy_config.StartOcrServer:
-    #     start_ocr_server_process(State.deploy_config.OcrServerPort)
+    if State.deploy_config.StartOcrServer:
+        start_ocr_server_process(State.deploy_config.OcrServerPort)
     if (
             State.deploy_config.EnableRemoteAccess
             and State.deploy_config.Password is not None
@@ -1216,7 +1217,7 @@ def clearup():
     logger.info("Start clearup")
     RemoteAccess.kill_ssh_process()
     # close_discord_rpc()
-    # stop_ocr_server_process()
+    stop_ocr_server_process()
     for alas in ProcessManager._processes.values():
         alas.stop()
     State.clearup()
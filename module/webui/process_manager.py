@@ -1,16 +1,110 @@
 import argparse
 import os
-import queue
 import threading
-from multiprocessing import Process
-from typing import Dict, List, Union
+from collections import deque
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from typing import Dict, List, Optional, Tuple, Union
 
 from filelock import FileLock
 from module.config.utils import filepath_config
-from module.logger import logger, set_file_logger, set_func_logger
+from module.logger import (
+    WEB_THEME,
+    Highlighter,
+    HTMLConsole,
+    LogRecordRenderer,
+    logger,
+    set_file_logger,
+    set_pipe_logger,
+)
 from module.webui.fake import get_config_mod, mod_instance
 from module.webui.setting import State
 from rich.console import Console, ConsoleRenderable
+from rich.terminal_theme import TerminalTheme
+
+
+class LogHTMLBuffer:
+    """
+    Logs of a ProcessManager rendered into HTML, each log is rendered exactly once
+    no matter how many sessions are watching.
+    """
+
+    def __init__(self, theme: TerminalTheme, width: int, maxlen: int) -> None:
+        # Imported here, so alas processes don't import pywebio
+        from module.webui.utils import LOG_CODE_FORMAT
+
+        self.theme = theme
+        self.code_format = LOG_CODE_FORMAT
+        self.console = HTMLConsole(
+            force_terminal=False,
+            force_interactive=False,
+            width=width,
+            color_system="truecolor",
+            markup=False,
+            record=True,
+            safe_box=False,
+            highlighter=Highlighter(),
+            theme=WEB_THEME,
+        )
+        # Rendered HTML, html[0] is the log with sequence number `start`
+        self.html: deque = deque(maxlen=maxlen)
+        self.start = 0
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.html)
+
+    def render(self, renderable: ConsoleRenderable) -> str:
+        with self.console.capture():
+            self.console.print(renderable)
+
+        return self.console.export_html(
+            theme=self.theme,
+            clear=True,
+            code_format=self.code_format,
+            inline_styles=True,
+        )
+
+    def sync(self, renderables: List[ConsoleRenderable], start: int) -> None:
+        """
+        Render new logs.
+
+        Args:
+            renderables: ProcessManager.renderables
+            start: Sequence number of renderables[0]
+        """
+        end = start + len(renderables)
+        if self.end < start or self.start > start:
+            # Too far behind or logs are reset
+            self.html.clear()
+            self.start = start
+        for renderable in renderables[self.end - start:]:
+            if len(self.html) == self.html.maxlen:
+                self.start += 1
+            self.html.append(self.render(renderable))
+        # Drop logs that are no longer in renderables
+        while self.start < start and self.html:
+            self.html.popleft()
+            self.start += 1
+        if not self.html:
+            self.start = end
+
+    def get(self, seq: Optional[int]) -> Tuple[str, int, bool]:
+        """
+        Args:
+            seq: Sequence number of the next log that session wants, None to get all
+
+        Returns:
+            str: HTML
+            int: Sequence number for the next call
+            bool: True if session should clear its logs before appending HTML
+        """
+        if seq is None or seq < self.start or seq > self.end:
+            return "".join(self.html), self.end, True
+        if seq == self.end:
+            return "", seq, False
+        html = list(self.html)[seq - self.start:]
+        return "".join(html), self.end, False
 
 
 class ProcessManager:
@@ -18,10 +112,16 @@ class ProcessManager:
 
     def __init__(self, config_name: str = "alas") -> None:
         self.config_name = config_name
-        self._renderable_queue: queue.Queue[ConsoleRenderable] = State.manager.Queue()
+        # Logs are sent as compact records through a pipe and rendered here
+        self._log_renderer = LogRecordRenderer()
         self.renderables: List[ConsoleRenderable] = []
         self.renderables_max_length = 400
         self.renderables_reduce_length = 80
+        # Sequence number of renderables[0]
+        self.renderables_start = 0
+        self._renderables_lock = threading.Lock()
+        # Key: (TerminalTheme, width). Value: LogHTMLBuffer
+        self._html_buffers: Dict[Tuple[TerminalTheme, int], LogHTMLBuffer] = {}
         self._process: Process = None
         self.thd_log_queue_handler: threading.Thread = None
 
@@ -29,26 +129,25 @@ class ProcessManager:
         if not self.alive:
             if func is None:
                 func = get_config_mod(self.config_name)
+            log_recv, log_send = Pipe(duplex=False)
             self._process = Process(
                 target=ProcessManager.run_process,
                 args=(
                     self.config_name,
                     func,
-                    self._renderable_queue,
+                    log_send,
                     ev,
                 ),
             )
             self._process.start()
-            self.start_log_queue_handler()
-
-    def start_log_queue_handler(self):
-        if (
-            self.thd_log_queue_handler is not None
-            and self.thd_log_queue_handler.is_alive()
-        ):
-            return
+            # Close the sending end in this process, so receiver gets EOF when alas exits
+            log_send.close()
+            self.start_log_queue_handler(log_recv)
+
+    def start_log_queue_handler(self, conn: Connection):
+        # Handler of the previous process exits by itself after reading all its logs
         self.thd_log_queue_handler = threading.Thread(
-            target=self._thread_log_queue_handler
+            target=self._thread_log_queue_handler, args=(conn,)
         )
         self.thd_log_queue_handler.start()
 
@@ -57,7 +156,7 @@ class ProcessManager:
         with lock:
             if self.alive:
                 self._process.kill()
-                self.renderables.append(
+                self.renderables_append(
                     f"[{self.config_name}] exited. Reason: Manual stop\n"
                 )
             if self.thd_log_queue_handler is not None:
@@ -68,16 +167,54 @@ class ProcessManager:
                     )
         logger.info(f"[{self.config_name}] exited")
 
-    def _thread_log_queue_handler(self) -> None:
-        while self.alive:
-            try:
-                log = self._renderable_queue.get(timeout=1)
-            except queue.Empty:
-                continue
-            self.renderables.append(log)
+    def _thread_log_queue_handler(self, conn: Connection) -> None:
+        try:
+            while True:
+                try:
+                    if not conn.poll(1):
+                        if not self.alive:
+                            break
+                        continue
+                    batch = conn.recv()
+                except (EOFError, OSError):
+                    break
+                for item in batch:
+                    self.renderables_append(self._log_renderer.render(item))
+        finally:
+            conn.close()
+        logger.info("End of log queue handler loop")
+
+    def renderables_append(self, renderable: ConsoleRenderable) -> None:
+        with self._renderables_lock:
+            self.renderables.append(renderable)
             if len(self.renderables) > self.renderables_max_length:
                 self.renderables = self.renderables[self.renderables_reduce_length :]
-        logger.info("End of log queue handler loop")
+                self.renderables_start += self.renderables_reduce_length
+
+    def get_html(
+        self, theme: TerminalTheme, width: int = 80, seq: Optional[int] = None
+    ) -> Tuple[str, int, bool]:
+        """
+        Get logs in HTML since a sequence number.
+        Logs are rendered once and shared by all sessions using the same theme and width.
+
+        Args:
+            theme:
+            width: Console width of session
+            seq: Sequence number returned from the last call, None to get all
+
+        Returns:
+            str: HTML
+            int: Sequence number for the next call
+            bool: True if session should clear its logs before appending HTML
+        """
+        with self._renderables_lock:
+            buffer = self._html_buffers.get((theme, width))
+            if buffer is None:
+                buffer = LogHTMLBuffer(theme, width, maxlen=self.renderables_max_length)
+                self._html_buffers[(theme, width)] = buffer
+            buffer.sync(self.renderables, self.renderables_start)
+            return buffer.get(seq)
 
     @property
     def alive(self) -> bool:
@@ -117,7 +254,7 @@ class ProcessManager:
 
     @staticmethod
     def run_process(
-        config_name, func: str, q: queue.Queue, e: threading.Event = None
+        config_name, func: str, log_conn: Connection, e: threading.Event = None
     ) -> None:
         parser = argparse.ArgumentParser()
         parser.add_argument(
@@ -133,7 +270,7 @@ class ProcessManager:
             logger.info("Electron detected, remove log output to stdout")
             from module.logger import console_hdlr
             logger.removeHandler(console_hdlr)
-        set_func_logger(func=q.put)
+        log_hdlr = set_pipe_logger(log_conn)
 
         from module.config.config import AzurLaneConfig
 
@@ -152,6 +289,9 @@ class ProcessManager:
             logger.info(f"[{config_name}] exited. Reason: Finish\n")
         except Exception as e:
             logger.exception(e)
+        finally:
+            # Child processes exit without running atexit, send the remaining logs
+            log_hdlr.flush()
 
     @classmethod
     def running_instances(cls) -> List["ProcessManager"]:
@@ -1,12 +1,13 @@
 import datetime
-import operator
+import heapq
+import itertools
 import re
 import sys
 import threading
 import time
 import traceback
 from queue import Queue
-from typing import Callable, Generator, List
+from typing import Callable, Dict, Generator, List, Optional
 
 import pywebio
 from module.config.utils import deep_iter
@@ -103,6 +104,25 @@ class Task:
         self.delay = delay
         self.next_run = next_run if next_run else time.time()
         self.name = name if name is not None else self.g.__name__
+        # Stats
+        self.run_count = 0
+        self.run_time_total = 0.0
+        self.run_time_max = 0.0
+        # Times that a run ended after the next scheduled run
+        self.overrun_count = 0
+
+    def record_run(self, cost: float) -> None:
+        self.run_count += 1
+        self.run_time_total += cost
+        self.run_time_max = max(self.run_time_max, cost)
+
+    @property
+    def stats(self) -> str:
+        avg = self.run_time_total / self.run_count if self.run_count else 0.0
+        return (
+            f"{self.name}: run={self.run_count}, avg={avg * 1000:.1f}ms, "
+            f"max={self.run_time_max * 1000:.1f}ms, overrun={self.overrun_count}"
+        )
 
     def __str__(self) -> str:
         return f"<{self.name} (delay={self.delay})>"
@@ -128,6 +148,18 @@ class TaskHandler:
         self._thread: threading.Thread = None
         self._alive = False
         self._lock = threading.Lock()
+        # Notified when tasks added or removed, or handler stopped
+        self._cond = threading.Condition(self._lock)
+        # Heap of (next_run, sequence, task)
+        self._heap: List[tuple] = []
+        # Key: Task. Value: its valid heap entry, entries of removed tasks are skipped when popped
+        self._heap_entries: Dict[Task, tuple] = {}
+        self._heap_seq = itertools.count()
+
+    def _heap_push(self, task: Task) -> None:
+        entry = (task.next_run, next(self._heap_seq), task)
+        self._heap_entries[task] = entry
+        heapq.heappush(self._heap, entry)
 
     def add(self, func, delay: float, pending_delete: bool = False) -> None:
         """
@@ -149,14 +181,18 @@ class TaskHandler:
             logger.warning(f"Task {task} already in tasks list.")
             return
         logger.info(f"Add task {task}")
-        with self._lock:
+        with self._cond:
             self.tasks.append(task)
+            self._heap_push(task)
+            self._cond.notify_all()
         if pending_delete:
             self.pending_remove_tasks.append(task)
 
     def _remove_task(self, task: Task) -> None:
         if task in self.tasks:
             self.tasks.remove(task)
+            self._heap_entries.pop(task, None)
+            self._cond.notify_all()
             logger.info(f"Task {task} removed.")
         else:
             logger.warning(
@@ -196,6 +232,31 @@ class TaskHandler:
                     return task
             return None
 
+    def _wait_next_task(self) -> Optional[Task]:
+        """
+        Wait until the earliest task is due, or handler stopped.
+
+        Returns:
+            Task: Or None if handler stopped
+        """
+        with self._cond:
+            while self._alive:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                entry = self._heap[0]
+                next_run, _, task = entry
+                if self._heap_entries.get(task) is not entry:
+                    # Removed task
+                    heapq.heappop(self._heap)
+                    continue
+                remain = next_run - time.time()
+                if remain <= 0:
+                    heapq.heappop(self._heap)
+                    return task
+                self._cond.wait(timeout=remain)
+            return None
+
     def loop(self) -> None:
         """
         Start task loop.
@@ -203,33 +264,40 @@ class TaskHandler:
         """
         self._alive = True
         while self._alive:
-            if self.tasks:
-                with self._lock:
-                    self.tasks.sort(key=operator.attrgetter("next_run"))
-                    task = self.tasks[0]
-                if task.next_run < time.time():
-                    start_time = time.time()
-                    try:
-                        self._task = task
-                        # logger.debug(f'Start task {task.g.__name__}')
-                        task.send(self)
-                        # logger.debug(f'End task {task.g.__name__}')
-                    except Exception as e:
-                        logger.exception(e)
-                        self.remove_task(task, nowait=True)
-                    finally:
-                        self._task = None
-                    end_time = time.time()
-                    task.next_run += task.delay
-                    with self._lock:
-                        for task in self.tasks:
-                            task.next_run += end_time - start_time
-                else:
-                    time.sleep(0.05)
-            else:
-                time.sleep(0.5)
+            task = self._wait_next_task()
+            if task is None:
+                break
+            start_time = time.time()
+            try:
+                self._task = task
+                # logger.debug(f'Start task {task.g.__name__}')
+                task.send(self)
+                # logger.debug(f'End task {task.g.__name__}')
+            except Exception as e:
+                logger.exception(e)
+                self.remove_task(task, nowait=True)
+            finally:
+                self._task = None
+            end_time = time.time()
+            task.record_run(end_time - start_time)
+
+            # Schedule at fixed rate, skip missed runs instead of running them in a burst
+            task.next_run += task.delay
+            if task.next_run < end_time:
+                task.overrun_count += 1
+                task.next_run = end_time
+            with self._cond:
+                # Task could be removed during run
+                if task in self._heap_entries:
+                    self._heap_push(task)
         logger.info("End of task handler loop")
 
+    def log_stats(self) -> None:
+        with self._lock:
+            tasks = list(self.tasks)
+        for task in tasks:
+            logger.info(task.stats)
+
     def _get_thread(self) -> threading.Thread:
         thread = threading.Thread(target=self.loop, daemon=True)
         return thread
@@ -247,7 +315,9 @@ class TaskHandler:
 
     def stop(self) -> None:
         self.remove_pending_task()
-        self._alive = False
+        with self._cond:
+            self._alive = False
+            self._cond.notify_all()
         self._thread.join(timeout=2)
         if not self._thread.is_alive():
             logger.info("Finish task handler")
@@ -7,9 +7,7 @@ from pywebio.exceptions import SessionException
 from pywebio.io_ctrl import Output
 from pywebio.output import *
 from pywebio.session import eval_js, local, run_js
-from rich.console import ConsoleRenderable
 
-from module.logger import WEB_THEME, Highlighter, HTMLConsole
 from module.webui.lang import t
 from module.webui.pin import put_checkbox, put_input, put_select, put_textarea
 from module.webui.process_manager import ProcessManager
@@ -17,7 +15,6 @@ from module.webui.setting import State
 from module.webui.utils import (
     DARK_TERMINAL_THEME,
     LIGHT_TERMINAL_THEME,
-    LOG_CODE_FORMAT,
     Switch,
 )
 
@@ -76,17 +73,8 @@ class RichLog:
     def __init__(self, scope, font_width="0.559") -> None:
         self.scope = scope
         self.font_width = font_width
-        self.console = HTMLConsole(
-            force_terminal=False,
-            force_interactive=False,
-            width=80,
-            color_system="truecolor",
-            markup=False,
-            record=True,
-            safe_box=False,
-            highlighter=Highlighter(),
-            theme=WEB_THEME,
-        )
+        # Console width of logs, measured from browser
+        self.width = 80
         # self.callback_id = output_register_callback(
         #     self._callback_set_width, serial_mode=True)
         # self._callback_thread = None
@@ -97,19 +85,6 @@ class RichLog:
         else:
             self.terminal_theme = LIGHT_TERMINAL_THEME
 
-    def render(self, renderable: ConsoleRenderable) -> str:
-        with self.console.capture():
-            self.console.print(renderable)
-
-        html = self.console.export_html(
-            theme=self.terminal_theme,
-            clear=True,
-            code_format=LOG_CODE_FORMAT,
-            inline_styles=True,
-        )
-        # print(html)
-        return html
-
     def extend(self, text):
         if text:
             run_js(
@@ -183,27 +158,27 @@ class RichLog:
     #             last_modify = time.time()
 
     #     self._callback_thread = None
-    #     self.console.width = int(_width)
+    #     self.width = int(_width)
 
     def put_log(self, pm: ProcessManager) -> Generator:
         yield
         try:
+            seq = None
+            counter = 0
             while True:
-                last_idx = len(pm.renderables)
-                html = "".join(map(self.render, pm.renderables[:]))
-                self.reset()
+                # Logs are rendered in ProcessManager, pull the new ones only
+                last_seq = seq
+                html, seq, reset = pm.get_html(self.terminal_theme, self.width, seq)
+                if reset:
+                    self.reset()
+                    counter = 0
+                else:
+                    counter += seq - last_seq
                 self.extend(html)
-                counter = last_idx
-                while counter < pm.renderables_max_length * 2:
-                    yield
-                    idx = len(pm.renderables)
-                    if idx < last_idx:
-                        last_idx -= pm.renderables_reduce_length
-                    if idx != last_idx:
-                        html = "".join(map(self.render, pm.renderables[last_idx:idx]))
-                        self.extend(html)
-                        counter += idx - last_idx
-                        last_idx = idx
+                # Re-fetch the whole backlog sometimes to drop old logs from page
+                if counter >= pm.renderables_max_length * 2:
+                    seq = None
+                yield
         except SessionException:
             pass
 
@@ -1,4 +1,5 @@
 import traceback
+from collections import deque
 
 from tasks.base.assets.assets_base_page import *
 
@@ -7,6 +8,81 @@ class Page:
     # Key: str, page name like "page_main"
     # Value: Page, page instance
     all_pages = {}
+    # Key: (Page, Page), source and destination
+    # Value: Page, the next page to go on the shortest path
+    # Compiled on first use, and invalidated when pages or links change
+    _route_next = None
+    # Key: (Page, Page), source and destination
+    # Value: int, number of clicks on the shortest path
+    _route_distance = None
+
+    @classmethod
+    def compile_routes(cls):
+        """
+        Shortest paths between all pages, by running BFS from each destination on reversed links.
+        """
+        # Key: page. Value: pages that have a link to it
+        incoming = {}
+        for page in cls.iter_pages():
+            for link in page.links:
+                incoming.setdefault(link, []).append(page)
+
+        route_next = {}
+        route_distance = {}
+        for destination in cls.iter_pages():
+            route_distance[destination, destination] = 0
+            queue = deque([destination])
+            while queue:
+                page = queue.popleft()
+                for source in incoming.get(page, []):
+                    if (source, destination) in route_distance:
+                        continue
+                    route_distance[source, destination] = route_distance[page, destination] + 1
+                    route_next[source, destination] = page
+                    queue.append(source)
+
+        cls._route_next = route_next
+        cls._route_distance = route_distance
+
+    @classmethod
+    def route_next(cls, source, destination):
+        """
+        Args:
+            source (Page):
+            destination (Page):
+
+        Returns:
+            Page: The next page to go from source to destination, or None if unreachable or arrived
+        """
+        if cls._route_next is None:
+            cls.compile_routes()
+        return cls._route_next.get((source, destination))
+
+    @classmethod
+    def route_distance(cls, source, destination):
+        """
+        Args:
+            source (Page):
+            destination (Page):
+
+        Returns:
+            int: Number of clicks from source to destination, or None if unreachable
+        """
+        if cls._route_distance is None:
+            cls.compile_routes()
+        return cls._route_distance.get((source, destination))
+
+    @classmethod
+    def iter_route_pages(cls, destination):
+        """
+        Args:
+            destination (Page):
+
+        Returns:
+            list[Page]: Pages that can go to destination, nearest first, destination excluded
+        """
+        pages = [page for page in cls.iter_pages() if cls.route_next(page, destination) is not None]
+        return sorted(pages, key=lambda page: cls.route_distance(page, destination))
 
     @classmethod
     def clear_connection(cls):
@@ -16,27 +92,14 @@ class Page:
     @classmethod
     def init_connection(cls, destination):
         """
-        Initialize an A* path finding among pages.
+        Set `parent` of each page to the next page on the way to destination.
 
         Args:
             destination (Page):
         """
         cls.clear_connection()
-
-        visited = [destination]
-        visited = set(visited)
-        while 1:
-            new = visited.copy()
-            for page in visited:
-                for link in cls.iter_pages():
-                    if link in visited:
-                        continue
-                    if page in link.links:
-                        link.parent = page
-                        new.add(link)
-            if len(new) == len(visited):
-                break
-            visited = new
+        for page in cls.iter_pages():
+            page.parent = cls.route_next(page, destination)
 
     @classmethod
     def iter_pages(cls):
@@ -54,6 +117,8 @@ class Page:
         self.name = text[:text.find('=')].strip()
         self.parent = None
         Page.all_pages[self.name] = self
+        Page._route_next = None
+        Page._route_distance = None
 
     def __eq__(self, other):
         return self.name == other.name
@@ -66,6 +131,8 @@ class Page:
 
     def link(self, button, destination):
         self.links[destination] = button
+        Page._route_next = None
+        Page._route_distance = None
 
 
 # Main page
@@ -1,6 +1,7 @@
 from module.base.button import ButtonWrapper
 from module.base.decorator import run_once
 from module.base.timer import Timer
+from module.base.trace import trace
 from module.exception import GameNotRunningError, GamePageUnknownError
 from module.logger import logger
 from module.ocr.ocr import Ocr
@@ -21,6 +22,30 @@ class UI(PopupHandler, StateMixin):
         """
         return self.appear(page.check_button)
 
+    def ui_page_appear_any(self, pages, interval=0):
+        """
+        Match check buttons of pages in one pass, the last known page is checked first.
+
+        Args:
+            pages (iterable[Page]):
+            interval (int, float):
+
+        Returns:
+            Page: The page appears, or None.
+        """
+        current = getattr(self, 'ui_current', None)
+        check = {}
+        if current is not None and current in pages and current.check_button is not None:
+            check[current.check_button] = current
+        for page in pages:
+            if page.check_button is not None:
+                check.setdefault(page.check_button, page)
+
+        button = self.appear_any(check.keys(), interval=interval)
+        if button is None:
+            return None
+        return check[button]
+
     def ui_get_current_page(self, skip_first_screenshot=True):
         """
         Args:
@@ -63,13 +88,11 @@ class UI(PopupHandler, StateMixin):
                 break
 
             # Known pages
-            for page in Page.iter_pages():
-                if page.check_button is None:
-                    continue
-                if self.ui_page_appear(page=page):
-                    logger.attr("UI", page.name)
-                    self.ui_current = page
-                    return page
+            page = self.ui_page_appear_any(Page.iter_pages())
+            if page is not None:
+                logger.attr("UI", page.name)
+                self.ui_current = page
+                return page
 
             # Unknown page but able to handle
             logger.info("Unknown ui page")
@@ -92,15 +115,20 @@ class UI(PopupHandler, StateMixin):
         logger.critical("Please switch to a supported page before starting SRC")
         raise GamePageUnknownError
 
+    @trace(cat='ui', detail=1)
     def ui_goto(self, destination, skip_first_screenshot=True):
         """
         Args:
             destination (Page):
             skip_first_screenshot:
         """
-        # Create connection
-        Page.init_connection(destination)
+        # All pages that can go to destination, routes are compiled once, see Page.compile_routes()
+        route_pages = Page.iter_route_pages(destination)
         self.interval_clear(list(Page.iter_check_buttons()))
+        # Last known page, the page itself and the next page on route are checked first.
+        # Other pages are scanned if they keep missing, in case popups took us elsewhere.
+        current = getattr(self, 'ui_current', None)
+        miss_timer = Timer(2, count=4)
 
         logger.hr(f"UI goto {destination}")
         while 1:
@@ -112,30 +140,43 @@ class UI(PopupHandler, StateMixin):
             # Destination page
             if self.ui_page_appear(destination):
                 logger.info(f'Page arrive: {destination}')
+                self.ui_current = destination
                 break
 
             # Other pages
-            clicked = False
-            for page in Page.iter_pages():
-                if page.parent is None or page.check_button is None:
-                    continue
-                if self.appear(page.check_button, interval=5):
-                    logger.info(f'Page switch: {page} -> {page.parent}')
-                    button = page.links[page.parent]
-                    self.device.click(button)
-                    self.ui_button_interval_reset(button)
-                    clicked = True
-                    break
-            if clicked:
+            page = None
+            candidates = []
+            route_next = Page.route_next(current, destination) if current is not None else None
+            if route_next is not None:
+                candidates = [current] if route_next == destination else [current, route_next]
+                # Page just clicked is in interval, skipping it is not a miss
+                checking = [
+                    p for p in candidates
+                    if p.check_button is not None and self.interval_is_reached(p.check_button, interval=5)
+                ]
+                if checking:
+                    page = self.ui_page_appear_any(checking, interval=5)
+                    if page is None:
+                        miss_timer.start()
+            if page is None and (route_next is None or (miss_timer.started() and miss_timer.reached())):
+                page = self.ui_page_appear_any([p for p in route_pages if p not in candidates], interval=5)
+                if page is None:
+                    miss_timer.reset()
+            if page is not None:
+                miss_timer.clear()
+                next_page = Page.route_next(page, destination)
+                logger.info(f'Page switch: {page} -> {next_page}')
+                button = page.links[next_page]
+                self.device.click(button)
+                self.ui_button_interval_reset(button)
+                current = page
+                self.ui_current = page
                 continue
 
             # Additional
             if self.ui_additional():
                 continue
 
-        # Reset connection
-        Page.clear_connection()
-
     def ui_ensure(self, destination, skip_first_screenshot=True):
         """
         Args:
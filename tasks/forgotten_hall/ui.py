@@ -64,6 +64,9 @@ class ForgottenHallStageOcr(Ocr):
 
 
 class DraggableStageList(DraggableList):
+    # Stages are found by star icons on the whole screen, OCR area doesn't apply
+    incremental_ocr = False
+
     def insight_row(self, row: Keyword, main: ModuleBase, skip_first_screenshot=True) -> bool:
         while 1:
             result = super().insight_row(row, main=main, skip_first_screenshot=skip_first_screenshot)